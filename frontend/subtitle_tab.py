@@ -9,22 +9,74 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.validators import is_valid_google_drive_link
 from utils.config import LANGUAGE_CODES, RESULTS_DIR
 
+def show_video(final_video_path, language_code):
+    """🎬 Display a video inline and offer it for download"""
+    with open(final_video_path, "rb") as video_file:
+        video_bytes = video_file.read()
+
+    video_base64 = base64.b64encode(video_bytes).decode("utf-8")
+
+    # 🔹 Display Video (Centered with Size Limit)
+    st.markdown(
+        f"""
+        <style>
+        .centered-video {{
+            display: flex;
+            justify-content: center;
+            align-items: center;
+        }}
+        video {{
+            max-width: 640px;
+            max-height: 360px;
+            border-radius: 10px;
+        }}
+        </style>
+        <div class="centered-video">
+            <video controls>
+                <source src="data:video/mp4;base64,{video_base64}" type="video/mp4">
+                Your browser does not support the video tag.
+            </video>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # 🔹 Download Button for Video
+    st.download_button(
+        label="🎬 Download Final Video",
+        data=video_bytes,
+        file_name=f"final_video_with_subtitles_{language_code}.mp4",
+        mime="video/mp4",
+        key=f"download_video_{language_code}"
+    )
+
+
 def subtitle_tab():
     """🔠 Subtitle Generation Tab"""
     st.subheader("🔠 Generate Subtitles")
-    st.write("Enter a video URL and choose a target language to generate subtitles.")
+    st.write("Enter a video URL and choose one or more target languages to generate subtitles.")
 
     # 🔹 Input: Video URL
     drive_link = st.text_input("🔗 **Google Drive Video Link**", key="subtitle_drive_link",
                                placeholder="Paste your video link here...",
                                help="Make sure your link is from Google Drive and shared publicly.")
 
-    # 🔹 Input: Target Language Selection
+    # 🔹 Input: Target Language Selection (the video is transcribed once for all of them)
     languages = list(LANGUAGE_CODES.keys())
-    target_language = st.selectbox("🌍 **Select Target Language for Subtitles**", languages, index=0)
+    target_languages = st.multiselect("🌍 **Select Target Languages for Subtitles**", languages,
+                                      default=[languages[0]])
+
+    # 🔹 Get Language Codes
+    language_codes = [LANGUAGE_CODES[language] for language in target_languages]
 
-    # 🔹 Get Language Code
-    language_code = LANGUAGE_CODES[target_language]
+    # 🔹 Output Mode: burn into the picture, or add a caption track without re-encoding
+    output_modes = {
+        "🔥 Burn into video": "burn",
+        "🎞️ Selectable caption track (fast)": "soft",
+        "🌐 WebVTT sidecar file (fastest)": "vtt"
+    }
+    output_mode = st.radio("🎬 **Subtitle Output**", list(output_modes.keys()), index=0, horizontal=True)
+    mode = output_modes[output_mode]
 
     # 🔹 Generate Subtitles Button
     if st.button("🚀 Generate Subtitles"):
@@ -32,84 +84,74 @@ def subtitle_tab():
             st.warning("⚠️ Please enter a valid video link.")
         elif not is_valid_google_drive_link(drive_link):
             st.error("❌ Invalid Google Drive link. Please enter a correct Google Drive video link.")
-        elif not language_code:
-            st.error("❌ Please enter a valid language code.")
+        elif not language_codes:
+            st.error("❌ Please select at least one target language.")
         else:
             with st.status("⏳ Processing your video...", expanded=True):
                 st.write("📥 Downloading video...")
                 st.write("🎵 Extracting audio...")
-                st.write(f"📝 Generating subtitles in {target_language} ({language_code})...")
+                st.write(f"📝 Generating subtitles in {', '.join(target_languages)}...")
 
                 # 🔹 Send request to backend
                 response = requests.post(
                     "http://127.0.0.1:5000/generate_subtitles",
-                    json={"video_url": drive_link, "target_language": language_code},
-                    timeout=300
+                    json={"video_url": drive_link, "target_languages": language_codes, "mode": mode},
+                    timeout=300 * len(language_codes)
                 )
 
                 if response.status_code == 200:
                     subtitle_data = response.json()
-                    subtitle_path = subtitle_data.get("subtitle_file")
-                    final_video = subtitle_data.get("final_video")  # This is the filename
+                    subtitle_files = subtitle_data.get("subtitle_files", {})
+                    vtt_files = subtitle_data.get("vtt_files") or {}
+                    final_videos = subtitle_data.get("final_videos") or {}
 
                     st.success("✅ Subtitles generated successfully!")
 
-                    # 🔹 Provide download buttons for subtitles
-                    if subtitle_path:
-                        subtitle_full_path = os.path.join(RESULTS_DIR, subtitle_path)
-                        if os.path.exists(subtitle_full_path):
-                            with open(subtitle_full_path, "r") as file:
-                                file_contents = file.read()
-                            st.download_button(
-                                label="📥 Download Subtitles (SRT)",
-                                data=file_contents,
-                                file_name="subtitles.srt",
-                                mime="text/plain"
-                            )
-
-                    # 🔹 Display Video and Provide Download Button
-                    if final_video:
-                        final_video_path = os.path.join(RESULTS_DIR, final_video)
+                    for language, language_code in zip(target_languages, language_codes):
+                        st.markdown(f"#### 🌍 {language}")
 
-                        if os.path.exists(final_video_path):
-                            with open(final_video_path, "rb") as video_file:
-                                video_bytes = video_file.read()
-
-                            video_base64 = base64.b64encode(video_bytes).decode("utf-8")
-
-                            # 🔹 Display Video (Centered with Size Limit)
-                            st.markdown(
-                                f"""
-                                <style>
-                                .centered-video {{
-                                    display: flex;
-                                    justify-content: center;
-                                    align-items: center;
-                                }}
-                                video {{
-                                    max-width: 640px;
-                                    max-height: 360px;
-                                    border-radius: 10px;
-                                }}
-                                </style>
-                                <div class="centered-video">
-                                    <video controls>
-                                        <source src="data:video/mp4;base64,{video_base64}" type="video/mp4">
-                                        Your browser does not support the video tag.
-                                    </video>
-                                </div>
-                                """,
-                                unsafe_allow_html=True
-                            )
-
-                            # 🔹 Download Button for Video
-                            with open(final_video_path, "rb") as file:
+                        # 🔹 Provide download buttons for subtitles
+                        subtitle_path = subtitle_files.get(language_code)
+                        if subtitle_path:
+                            subtitle_full_path = os.path.join(RESULTS_DIR, subtitle_path)
+                            if os.path.exists(subtitle_full_path):
+                                with open(subtitle_full_path, "r", encoding="utf-8") as file:
+                                    file_contents = file.read()
                                 st.download_button(
-                                    label="🎬 Download Final Video",
-                                    data=file,
-                                    file_name="final_video_with_subtitles.mp4",
-                                    mime="video/mp4"
+                                    label="📥 Download Subtitles (SRT)",
+                                    data=file_contents,
+                                    file_name=f"subtitles_{language_code}.srt",
+                                    mime="text/plain",
+                                    key=f"download_srt_{language_code}"
                                 )
+
+                        # 🔹 WebVTT sidecar download
+                        vtt_path = vtt_files.get(language_code)
+                        if vtt_path and os.path.exists(vtt_path):
+                            with open(vtt_path, "r", encoding="utf-8") as file:
+                                st.download_button(
+                                    label="📥 Download Subtitles (WebVTT)",
+                                    data=file.read(),
+                                    file_name=f"subtitles_{language_code}.vtt",
+                                    mime="text/vtt",
+                                    key=f"download_vtt_{language_code}"
+                                )
+
+                        # 🔹 Burned-in mode: one video per language
+                        final_video = final_videos.get(language_code)
+                        if final_video:
+                            final_video_path = os.path.join(RESULTS_DIR, final_video)
+                            if os.path.exists(final_video_path):
+                                show_video(final_video_path, language_code)
+                            else:
+                                st.error("❌ Error: Final video not found.")
+
+                    # 🔹 Caption-track mode: one video carrying every language
+                    if mode == "soft" and subtitle_data.get("final_video"):
+                        final_video_path = os.path.join(RESULTS_DIR, subtitle_data["final_video"])
+                        if os.path.exists(final_video_path):
+                            st.markdown("#### 🎞️ Video with caption tracks")
+                            show_video(final_video_path, "tracks")
                         else:
                             st.error("❌ Error: Final video not found.")
                 else:
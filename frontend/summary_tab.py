@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+import json
 import time
 import sys
 import os
@@ -49,34 +50,63 @@ def summary_tab():
                     st.error("Failed to extract transcript.")
                     return
 
-                # 🔹 Send transcript to backend for summarization
-                response = requests.post(
-                    "http://127.0.0.1:5000/summarize",
-                    json={"transcript": transcript_text}  # ✅ Now sending "transcript"
-                )
+                # 🔹 Stream the summary from the backend and render it as it is generated
+                status.update(label="🤖 Generating summary...")
+                st.subheader("📜 Summary:")
+                partial_placeholder = st.empty()
+                summary_placeholder = st.empty()
+                partial_summaries, summary_text, file_path = [], "", None
 
-                if response.status_code == 200:
-                    summary_data = response.json()
-                    summary_text = summary_data.get("summary", "No summary generated.")
-                    file_path = summary_data.get("file_path")
+                try:
+                    with requests.post(
+                        "http://127.0.0.1:5000/summarize/stream",
+                        json={"transcript": transcript_text},
+                        stream=True
+                    ) as response:
+                        if response.status_code != 200:
+                            status.update(label="❌ Error!", state="error")
+                            st.error("Error: " + response.json().get("error", "Unknown error."))
+                            return
 
-                    status.update(label="✅ Summary Ready!", state="complete")
-                    st.subheader("📜 Summary:")
-                    st.text_area("Generated Summary", summary_text, height=200)
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line:
+                                continue
+                            event = json.loads(line)
 
-                    # 🔹 Provide a download button for the summary file
-                    if file_path and os.path.exists(file_path):
-                        with open(file_path, "r") as file:
-                            file_contents = file.read()
-                        st.download_button(
-                            label="📥 Download Summary",
-                            data=file_contents,
-                            file_name="summary.txt",
-                            mime="text/plain"
-                        )
-                    else:
-                        st.error("❌ Summary file not found!")
+                            if event["type"] == "partial":
+                                # Long transcripts: show each section's summary while the rest is processed
+                                partial_summaries.append(event["text"])
+                                partial_placeholder.info(
+                                    f"🧩 Summarized section {event['index'] + 1}/{event['total']} "
+                                    f"(round {event['round']})\n\n" + "\n\n".join(partial_summaries[-3:])
+                                )
+                            elif event["type"] == "token":
+                                summary_text += event["text"]
+                                summary_placeholder.markdown(summary_text + " ▌")
+                            elif event["type"] == "summary":
+                                summary_text, file_path = event["summary"], event.get("file_path")
+                            elif event["type"] == "error":
+                                status.update(label="❌ Error!", state="error")
+                                st.error("Error: " + event["error"])
+                                return
+                except requests.RequestException as e:
+                    status.update(label="❌ Error!", state="error")
+                    st.error(f"Error: {e}")
+                    return
 
+                partial_placeholder.empty()
+                summary_placeholder.text_area("Generated Summary", summary_text or "No summary generated.", height=200)
+                status.update(label="✅ Summary Ready!", state="complete")
+
+                # 🔹 Provide a download button for the summary file
+                if file_path and os.path.exists(file_path):
+                    with open(file_path, "r") as file:
+                        file_contents = file.read()
+                    st.download_button(
+                        label="📥 Download Summary",
+                        data=file_contents,
+                        file_name="summary.txt",
+                        mime="text/plain"
+                    )
                 else:
-                    status.update(label="❌ Error!", state="error")
-                    st.error("Error: " + response.json().get("error", "Unknown error."))
+                    st.error("❌ Summary file not found!")
@@ -1,6 +1,6 @@
 import streamlit as st
 import requests
-import time
+import json
 import os
 import sys
 
@@ -25,46 +25,63 @@ def timeline_tab():
             st.error("❌ Invalid Google Drive link. Please enter a correct Google Drive video link.")
         else:
             with st.status("⏳ Processing your video...", expanded=True) as status:
-                steps = [
-                    "📥 Downloading video...",
-                    "🎵 Extracting audio...",
-                    "📝 Transcribing with timestamps...",
-                ]
-                progress_bar = st.progress(0)
+                stage_labels = {
+                    "downloading": "📥 Downloading video...",
+                    "extracting_audio": "🎵 Extracting audio...",
+                    "transcribing": "📝 Transcribing with timestamps...",
+                }
 
-                for i, step in enumerate(steps):
-                    st.write(step)
-                    progress_bar.progress((i + 1) / len(steps))
-                    time.sleep(2)
+                st.subheader("📜 Transcript with Timeline:")
+                transcript_placeholder = st.empty()
+                lines, file_path = [], None
 
-                # 🔹 Send request to backend for transcript with timeline
-                response = requests.post(
-                    "http://127.0.0.1:5000/transcript",
-                    json={"video_url": drive_link, "use_timeline": True},
-                    timeout=300
-                )
+                # 🔹 Stream segments from the backend and append each one as soon as it is decoded
+                try:
+                    with requests.post(
+                        "http://127.0.0.1:5000/transcript/stream",
+                        json={"video_url": drive_link},
+                        stream=True,
+                        timeout=300
+                    ) as response:
+                        if response.status_code != 200:
+                            status.update(label="❌ Error!", state="error")
+                            st.error("Error: " + response.json().get("error", "Unknown error."))
+                            return
 
-                if response.status_code == 200:
-                    transcript_data = response.json()
-                    transcript_text = transcript_data.get("transcript", "No transcript generated.")
-                    file_path = transcript_data.get("file_path", "")
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line:
+                                continue
+                            event = json.loads(line)
 
-                    status.update(label="✅ Transcript Ready!", state="complete")
-                    st.subheader("📜 Transcript with Timeline:")
-                    st.text_area("Generated Transcript", transcript_text, height=300)
+                            if event["type"] == "status":
+                                st.write(stage_labels.get(event["stage"], event["stage"]))
+                            elif event["type"] == "segment":
+                                lines.append(f"At {event['timestamp']}: {event['text']}")
+                                transcript_placeholder.code("\n".join(lines), language=None)
+                            elif event["type"] == "done":
+                                file_path = event.get("file_path")
+                            elif event["type"] == "error":
+                                status.update(label="❌ Error!", state="error")
+                                st.error("Error: " + event["error"])
+                                return
+                except requests.RequestException as e:
+                    status.update(label="❌ Error!", state="error")
+                    st.error(f"Error: {e}")
+                    return
+
+                status.update(label="✅ Transcript Ready!", state="complete")
+                transcript_placeholder.text_area("Generated Transcript", "\n".join(lines) or "No transcript generated.",
+                                                 height=300)
 
-                    # 🔹 Provide a download button for the transcript file
-                    if file_path and os.path.exists(file_path):
-                        with open(file_path, "r") as file:
-                            file_contents = file.read()
-                        st.download_button(
-                            label="📥 Download Transcript",
-                            data=file_contents,
-                            file_name="transcript_with_timestamps.txt",
-                            mime="text/plain"
-                        )
-                    else:
-                        st.error("❌ Transcript file not found! Check `results/` folder.")
+                # 🔹 Provide a download button for the transcript file
+                if file_path and os.path.exists(file_path):
+                    with open(file_path, "r") as file:
+                        file_contents = file.read()
+                    st.download_button(
+                        label="📥 Download Transcript",
+                        data=file_contents,
+                        file_name="transcript_with_timestamps.txt",
+                        mime="text/plain"
+                    )
                 else:
-                    status.update(label="❌ Error!", state="error")
-                    st.error("Error: " + response.json().get("error", "Unknown error."))
+                    st.error("❌ Transcript file not found! Check `results/` folder.")
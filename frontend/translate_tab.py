@@ -23,9 +23,9 @@ def translate_tab():
         help="Make sure your link is from Google Drive and shared publicly."
     )
 
-    # 🔹 Select Target Language
+    # 🔹 Select Target Languages (the video is transcribed once for all of them)
     languages = list(LANGUAGE_CODES.keys())
-    target_language = st.selectbox("🌍 **Select Target Language**", languages, index=1)
+    target_languages = st.multiselect("🌍 **Select Target Languages**", languages, default=[languages[1]])
 
     # 🔹 Translate Button
     if st.button("🚀 Translate"):
@@ -37,10 +37,16 @@ def translate_tab():
             st.error("❌ Invalid Google Drive link. Please enter a correct Google Drive video link.")
             return
 
+        if not target_languages:
+            st.warning("⚠️ Please select at least one target language.")
+            return
+
+        target_names = ", ".join(target_languages)
+
         with st.status("⏳ Translating...", expanded=True) as status:
             steps = [
                 "📥 Extracting transcript with timestamps...",
-                f"🌍 Translating transcript to {target_language}...",
+                f"🌍 Translating transcript to {target_names}...",
                 "📜 Generating translated transcript...",
             ]
 
@@ -56,7 +62,8 @@ def translate_tab():
             try:
                 response = requests.post(
                     "http://127.0.0.1:5000/translate",
-                    json={"video_url": drive_link, "target_language": LANGUAGE_CODES[target_language]}
+                    json={"video_url": drive_link,
+                          "target_languages": [LANGUAGE_CODES[language] for language in target_languages]}
                 )
 
                 # ✅ Ensure response is valid
@@ -66,34 +73,39 @@ def translate_tab():
                     st.error(f"❌ Translation Failed: {error_msg}")
                     return
 
-                translation_data = response.json()
-
-                translated_text = translation_data.get("translated_transcript", "").strip()
-                translated_file = translation_data.get("translated_transcript_path", "")
+                translations = response.json().get("translations", {})
 
-                if not translated_text:
+                if not any(t.get("translated_transcript", "").strip() for t in translations.values()):
                     status.update(label="❌ Translation Failed: Empty transcript received", state="error")
                     st.error("❌ Translation Failed: Empty transcript received.")
                     return
 
-                # ✅ Display Translated Text
+                # ✅ Display one translated transcript per language
                 status.update(label="✅ Translation Completed!", state="complete")
-                st.subheader("📜 Translated Transcript:")
-                st.text_area("📜 Translated Transcript", translated_text, height=300)
-
-                # 🔹 Provide a download button
-                if translated_file and os.path.exists(translated_file):
-                    with open(translated_file, "r", encoding="utf-8") as file:
-                        file_contents = file.read().encode("utf-8")
-
-                    st.download_button(
-                        label="📥 Download Translated Transcript",
-                        data=file_contents,
-                        file_name=f"translated_transcript_{LANGUAGE_CODES[target_language]}.txt",
-                        mime="text/plain"
-                    )
-                else:
-                    st.error("❌ Translated transcript file not found!")
+                for language in target_languages:
+                    language_code = LANGUAGE_CODES[language]
+                    translation = translations.get(language_code, {})
+                    translated_text = translation.get("translated_transcript", "").strip()
+                    translated_file = translation.get("translated_transcript_path", "")
+
+                    st.subheader(f"📜 Translated Transcript ({language}):")
+                    st.text_area(f"📜 Translated Transcript ({language})", translated_text, height=300,
+                                 key=f"translated_transcript_{language_code}")
+
+                    # 🔹 Provide a download button
+                    if translated_file and os.path.exists(translated_file):
+                        with open(translated_file, "r", encoding="utf-8") as file:
+                            file_contents = file.read().encode("utf-8")
+
+                        st.download_button(
+                            label=f"📥 Download Translated Transcript ({language})",
+                            data=file_contents,
+                            file_name=f"translated_transcript_{language_code}.txt",
+                            mime="text/plain",
+                            key=f"download_translation_{language_code}"
+                        )
+                    else:
+                        st.error(f"❌ Translated transcript file not found ({language})!")
 
             except requests.exceptions.RequestException as e:
                 status.update(label="❌ Translation Failed: Server error", state="error")
@@ -0,0 +1,71 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.chunked_transcription import plan_audio_chunks, map_bounded
+from utils.media import SAMPLE_RATE
+
+
+def _noise(seconds, level, seed=0):
+    return np.random.default_rng(seed).normal(0, level, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def _assert_covers(chunks, audio):
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+
+
+def test_low_contrast_audio_keeps_every_chunk():
+    # Speech barely above the background: the VAD sees almost no "speech" frames
+    audio = np.concatenate([_noise(280, 0.05), _noise(20, 0.2, seed=1)])
+    chunks = plan_audio_chunks(audio, chunk_seconds=60)
+
+    _assert_covers(chunks, audio)
+    assert len(chunks) >= 4
+
+
+def test_cuts_land_in_silences():
+    parts = []
+    for i in range(30):
+        parts += [_noise(8, 0.3, seed=i), _noise(2, 0.001, seed=100 + i)]
+    audio = np.concatenate(parts)
+    chunks = plan_audio_chunks(audio, chunk_seconds=60)
+
+    _assert_covers(chunks, audio)
+    for _, end in chunks[:-1]:
+        assert 8 <= (end / SAMPLE_RATE) % 10 <= 10  # Inside a 2 s pause after each 8 s of speech
+
+
+def test_silent_audio_is_still_chunked():
+    audio = np.zeros(200 * SAMPLE_RATE, dtype=np.float32)
+    chunks = plan_audio_chunks(audio, chunk_seconds=60)
+
+    _assert_covers(chunks, audio)
+    assert len(chunks) > 1
+
+
+def test_map_bounded_keeps_order_and_limits_jobs_in_flight():
+    consumed = []
+
+    def jobs():
+        for i in range(10):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        in_flight = []
+
+        def run(job):
+            in_flight.append(len(consumed) - job)
+            return job * job
+
+        results = map_bounded(pool, run, jobs(), max_in_flight=3)
+
+    assert results == [i * i for i in range(10)]
+    assert max(in_flight) <= 3
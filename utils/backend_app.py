@@ -1,49 +1,271 @@
 import sys
 import os
+import json
+import threading
 
 # 🔹 Ensure Python can find `utils/`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.transcript import transcript_with_timeline, transcript
-from utils.summarization import summarize_text
-from utils.translate import extract_and_translate_transcript
+from utils.transcript import (
+    transcript_with_timeline, transcript, stream_transcript_with_timeline, preload_whisper_models
+)
+from utils.chunked_transcription import start_transcription_workers
+from utils.transcription_engines import TRANSCRIPTION_ENGINES, missing_engine_package
+from utils.summarization import (
+    summarize_text, stream_summary, missing_summary_package, load_models as load_summary_models
+)
+from utils.translate import extract_and_translate_transcript, translation_memory
 from utils.subtitle import generate_subtitles
-from utils.config import RESULTS_DIR, LANGUAGE_CODES
-from flask import Flask, request, jsonify
+from utils.config import (
+    RESULTS_DIR, LANGUAGE_CODES, SUBTITLE_MODES, BURN_IN_SMART_RENDER, WARMUP_COMPONENTS, TRANSCRIPTION_TIERS,
+    TRANSCRIPTION_ENGINE, SUMMARY_ENGINE
+)
+from utils.jobs import JobManager, no_progress
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from waitress import serve
 
 app = Flask(__name__)
 CORS(app)  # Allow frontend to communicate with backend
 
+# 🔹 Background jobs (submit returns immediately, poll `GET /jobs/<id>`)
+job_manager = JobManager()
+
+
+@app.before_request
+def start_workspace_pruning():
+    """Start deleting expired workspaces, including those of synchronous requests, on the first request."""
+    job_manager.start_pruning()
+
+
+# 🔹 Models are loaded on first use; these are warmed up in the background at boot
+WARMUP_LOADERS = {
+    "whisper": preload_whisper_models,
+    "summarizer": load_summary_models,
+    "whisper_workers": start_transcription_workers
+}
+readiness = {name: "pending" for name in WARMUP_COMPONENTS}
+
+
+def warm_up(components=WARMUP_COMPONENTS):
+    """Load each component's models, recording "loading", "ready" or the error in `readiness`."""
+    for name in components:
+        loader = WARMUP_LOADERS.get(name)
+        if loader is None:
+            readiness[name] = f"error: unknown component (available: {', '.join(WARMUP_LOADERS)})"
+            continue
+        readiness[name] = "loading"
+        try:
+            loader()
+            readiness[name] = "ready"
+        except Exception as e:
+            print(f"❌ Warm-up failed for {name}: {e}")
+            readiness[name] = f"error: {e}"
+
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def start_warm_up(components=WARMUP_COMPONENTS):
+    """Run `warm_up` once, on a daemon thread, so the server accepts connections immediately."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(components,), name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+@app.before_request
+def start_background_warm_up():
+    """
+    Start the warm-up on the first request (e.g. the first /readyz probe) when the app is served by
+    something other than `__main__`, such as `waitress-serve utils.backend_app:app`. It is not
+    started at import, since spawned worker processes re-import the main module.
+    """
+    start_warm_up()
+
+
+class PipelineError(Exception):
+    """Raised by the run_* helpers when a pipeline stage fails."""
+
+
+# --- Pipelines shared by the synchronous endpoints and background jobs ---
+def run_transcript(video_url, use_timeline=False, engine=None, tier=None, workspace=None, progress=no_progress):
+    """Transcribe a video; returns the transcript (and its file path for timeline transcripts)."""
+    if use_timeline:
+        transcript_path = transcript_with_timeline(video_url, workspace, progress, engine, tier)  # Timeline transcript
+        if transcript_path and os.path.exists(transcript_path):
+            with open(transcript_path, "r", encoding="utf-8") as file:
+                timeline_transcript = file.read()
+            return {"transcript": timeline_transcript, "file_path": transcript_path}  # ✅ Correct path
+        raise PipelineError("Failed to generate transcript with timestamps")
+
+    plain_transcript = transcript(video_url, workspace, progress, engine, tier)  # Generate plain transcript
+    if plain_transcript:
+        return {"transcript": plain_transcript}
+    raise PipelineError("Failed to generate transcript")
+
+
+def run_translate(video_url, target_language="fr", engine=None, tier=None, workspace=None, progress=no_progress):
+    """Transcribe a video with timestamps once and translate the transcript to one or more languages."""
+    transcript_data = extract_and_translate_transcript(video_url, target_language, workspace, progress, engine, tier)
+
+    if "error" in transcript_data:
+        raise PipelineError(transcript_data["error"])
+
+    original_transcript_path = transcript_data.get("original_transcript")
+
+    # Ensure original transcript is read correctly
+    if original_transcript_path and os.path.exists(original_transcript_path):
+        with open(original_transcript_path, "r", encoding="utf-8") as file:
+            original_transcript = file.read()
+    else:
+        raise PipelineError("Failed to retrieve original transcript")
+
+    # Ensure every translated transcript is read correctly
+    translations = {}
+    for language, translated_transcript_path in transcript_data["translations"].items():
+        if translated_transcript_path and os.path.exists(translated_transcript_path):
+            with open(translated_transcript_path, "r", encoding="utf-8") as file:
+                translations[language] = {
+                    "translated_transcript": file.read(),
+                    "translated_transcript_path": translated_transcript_path
+                }
+        else:
+            raise PipelineError(f"Failed to retrieve translated transcript ({language})")
+
+    first = next(iter(translations.values()))
+    return {
+        "message": "Translation completed successfully",
+        "original_transcript": original_transcript,
+        "original_transcript_path": original_transcript_path,
+        "translated_transcript": first["translated_transcript"],
+        "translated_transcript_path": first["translated_transcript_path"],
+        "translations": translations
+    }
+
+
+def run_generate_subtitles(video_url, target_language, mode="burn", smart_render=BURN_IN_SMART_RENDER, engine=None,
+                           tier=None, workspace=None, progress=no_progress):
+    """Generate subtitles for a video and burn them in, mux them as tracks, or write WebVTT sidecars."""
+    result = generate_subtitles(video_url, target_language, workspace, progress, mode=mode, smart_render=smart_render,
+                                engine=engine, tier=tier)
+
+    if not os.path.exists(result["final_video"]) or not os.path.exists(result["subtitle_file"]):
+        raise PipelineError("Subtitle generation failed.")
+
+    return result
+
+
+def target_languages(data, default=None):
+    """
+    Read `target_languages` (list) or `target_language` (code or list) from a request body,
+    dropping repeated languages (first occurrence kept) so each is only produced once.
+    """
+    languages = data.get("target_languages") or data.get("target_language", default)
+    languages = languages if isinstance(languages, list) else [languages]
+    return list(dict.fromkeys(str(language) for language in languages))
+
+
+def validate_request(kind, data):
+    """Return an error message if the request body is invalid for `kind`, else None."""
+    if not data.get("video_url"):
+        return "No video URL provided"
+    if data.get("engine") and data["engine"] not in TRANSCRIPTION_ENGINES:
+        return "Unsupported engine. Supported engines: " + ", ".join(TRANSCRIPTION_ENGINES)
+    missing = missing_engine_package(data.get("engine"))
+    if missing:
+        engine = data.get("engine") or TRANSCRIPTION_ENGINE
+        return f"Transcription engine '{engine}' is not installed on this server (pip install {missing})"
+    if data.get("tier") and data["tier"] not in TRANSCRIPTION_TIERS:
+        return "Unsupported tier. Supported tiers: " + ", ".join(TRANSCRIPTION_TIERS)
+    if kind == "translate":
+        languages = target_languages(data, "fr")
+        if not languages:
+            return "No target language provided"
+        if any(language not in LANGUAGE_CODES.values() for language in languages):
+            return "Unsupported language"
+    if kind == "generate_subtitles":
+        languages = target_languages(data)
+        if data.get("mode", "burn") not in SUBTITLE_MODES:
+            return "Unsupported mode. Supported modes: " + ", ".join(SUBTITLE_MODES)
+        if not languages:
+            return "No target language provided"
+        if any(language not in LANGUAGE_CODES.values() for language in languages):
+            return "Unsupported language. Supported languages: " + ", ".join(LANGUAGE_CODES.keys())
+    return None
+
+
+def summary_engine_error():
+    """Return an error message if the configured summary engine's dependencies are missing, else None."""
+    missing = missing_summary_package()
+    if missing:
+        return f"Summary engine '{SUMMARY_ENGINE}' is not installed on this server (pip install {missing})"
+    return None
+
+
+def job_params(kind, data):
+    """Extract the pipeline keyword arguments for `kind` from a request body."""
+    transcription = {"engine": data.get("engine"), "tier": data.get("tier")}
+    if kind == "transcript":
+        return {"video_url": data["video_url"], "use_timeline": data.get("use_timeline", False), **transcription}
+
+    # 🔹 One language keeps the single-language response shape; several fan out
+    languages = target_languages(data, "fr" if kind == "translate" else None)
+    target_language = languages[0] if len(languages) == 1 else languages
+    if kind == "translate":
+        return {"video_url": data["video_url"], "target_language": target_language, **transcription}
+    return {"video_url": data["video_url"], "target_language": target_language,
+            "mode": data.get("mode", "burn"), "smart_render": bool(data.get("smart_render", BURN_IN_SMART_RENDER)),
+            **transcription}
+
+
+PIPELINES = {
+    "transcript": run_transcript,
+    "translate": run_translate,
+    "generate_subtitles": run_generate_subtitles
+}
+
 # --- API 1: Extract Transcript from Video with timeline ---
 @app.route('/transcript', methods=['POST'])
 def get_transcript():
     """Extract transcript from uploaded video."""
     try:
         data = request.json
-        video_url = data.get("video_url")
-        use_timeline = data.get("use_timeline", False)  # Default to False
-
-        if not video_url:
-            return jsonify({"error": "No video URL provided"}), 400
-
-        if use_timeline:
-            transcript_path = transcript_with_timeline(video_url)  # Generate timeline transcript
-            if transcript_path and os.path.exists(transcript_path):
-                with open(transcript_path, "r") as file:
-                    timeline_transcript = file.read()
-                return jsonify({"transcript": timeline_transcript, "file_path": transcript_path})  # ✅ Correct path
-            return jsonify({"error": "Failed to generate transcript with timestamps"}), 500
-        else:
-            plain_transcript = transcript(video_url)  # Generate plain transcript
-            if plain_transcript:
-                return jsonify({"transcript": plain_transcript})
-            return jsonify({"error": "Failed to generate transcript"}), 500
+        error = validate_request("transcript", data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        return jsonify(run_transcript(**job_params("transcript", data)))
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/transcript/stream', methods=['POST'])
+def stream_transcript_api():
+    """
+    Stream the timeline transcript as newline-delimited JSON events, one per Whisper segment
+    as soon as its window is decoded, then a final event with the saved transcript's path.
+    """
+    data = request.json or {}
+    error = validate_request("transcript", data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    def events():
+        try:
+            for event in stream_transcript_with_timeline(data["video_url"], engine=data.get("engine"),
+                                                         tier=data.get("tier")):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    return Response(stream_with_context(events()), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # --- API 2: Summarization (Basic) ---
 @app.route('/summarize', methods=['POST'])
 def get_summary():
@@ -55,6 +277,10 @@ def get_summary():
         if not transcript_text:
             return jsonify({"error": "No transcript provided"}), 400
 
+        error = summary_engine_error()
+        if error:
+            return jsonify({"error": error}), 503
+
         # ✅ Now correctly handles both summary and file path
         summary, file_path = summarize_text(transcript_text, save=True)
 
@@ -62,6 +288,33 @@ def get_summary():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+
+@app.route('/summarize/stream', methods=['POST'])
+def stream_summary_api():
+    """
+    Stream the summary as newline-delimited JSON events: partial window summaries for
+    long transcripts, then the final summary token by token, then the finished result.
+    """
+    data = request.json or {}
+    transcript_text = data.get("transcript")
+
+    if not transcript_text:
+        return jsonify({"error": "No transcript provided"}), 400
+
+    error = summary_engine_error()
+    if error:
+        return jsonify({"error": error}), 503
+
+    def events():
+        try:
+            for event in stream_summary(transcript_text):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    return Response(stream_with_context(events()), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # --- API 3: Translate Summary ---
 @app.route('/translate', methods=['POST'])
 def translate_text_api():
@@ -70,44 +323,11 @@ def translate_text_api():
     """
     try:
         data = request.json
-        video_url = data.get("video_url")
-        target_language = data.get("target_language", "fr")  # Default to French
-
-        if not video_url:
-            return jsonify({"error": "No video URL provided"}), 400
+        error = validate_request("translate", data)
+        if error:
+            return jsonify({"error": error}), 400
 
-        if target_language not in LANGUAGE_CODES.values():
-            return jsonify({"error": "Unsupported language"}), 400
-
-        transcript_data = extract_and_translate_transcript(video_url, target_language)
-
-        if "error" in transcript_data:
-            return jsonify({"error": transcript_data["error"]}), 500
-
-        original_transcript_path = transcript_data.get("original_transcript")
-        translated_transcript_path = transcript_data.get("translated_transcript")
-
-        # Ensure original transcript is read correctly
-        if original_transcript_path and os.path.exists(original_transcript_path):
-            with open(original_transcript_path, "r", encoding="utf-8") as file:
-                original_transcript = file.read()
-        else:
-            return jsonify({"error": "Failed to retrieve original transcript"}), 500
-
-        # Ensure translated transcript is read correctly
-        if translated_transcript_path and os.path.exists(translated_transcript_path):
-            with open(translated_transcript_path, "r", encoding="utf-8") as file:
-                translated_transcript = file.read()
-        else:
-            return jsonify({"error": "Failed to retrieve translated transcript"}), 500
-
-        return jsonify({
-            "message": "Translation completed successfully",
-            "original_transcript": original_transcript,
-            "original_transcript_path": original_transcript_path,
-            "translated_transcript": translated_transcript,
-            "translated_transcript_path": translated_transcript_path
-        }), 200
+        return jsonify(run_translate(**job_params("translate", data))), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -119,34 +339,74 @@ def generate_subtitles_api():
     """API endpoint to generate subtitles for a given video."""
     try:
         data = request.json
-        video_url = data.get("video_url")
-        target_language = data.get("target_language")
 
         # 🔹 Validate inputs
-        if not video_url:
-            return jsonify({"error": "No video URL provided"}), 400
-        if target_language not in LANGUAGE_CODES.values():
-            return jsonify({"error": "Unsupported language. Supported languages: " + ", ".join(LANGUAGE_CODES.keys())}), 400
+        error = validate_request("generate_subtitles", data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        # 🔹 Return subtitle file and processed video file path
+        return jsonify(run_generate_subtitles(**job_params("generate_subtitles", data))), 200
 
-        # 🔹 Call the subtitle generation function
-        final_video_path = generate_subtitles(video_url, target_language)
-        
-        # 🔹 Define subtitle file path (assuming the function saves subtitles as `subtitles.srt`)
-        subtitle_file_path = os.path.join(os.path.dirname(final_video_path), "subtitles.srt")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        if not os.path.exists(final_video_path) or not os.path.exists(subtitle_file_path):
-            return jsonify({"error": "Subtitle generation failed."}), 500
 
-        # 🔹 Return subtitle file and processed video file path
-        response_data = {
-            "final_video": final_video_path,
-            "subtitle_file": subtitle_file_path
-        }
+# --- API 5: Background Jobs ---
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a transcript, translate or generate_subtitles job and return its ID immediately.
+    Body: {"type": "...", plus the same fields as the synchronous endpoint}.
+    """
+    try:
+        data = request.json or {}
+        kind = data.get("type")
 
-        return jsonify(response_data), 200
+        if kind not in PIPELINES:
+            return jsonify({"error": "Unsupported job type. Supported types: " + ", ".join(PIPELINES)}), 400
+
+        error = validate_request(kind, data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        job = job_manager.submit(kind, PIPELINES[kind], **job_params(kind, data))
+        return jsonify({"job_id": job.id, "status_url": f"/jobs/{job.id}"}), 202
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report a job's status, stage, progress and result paths."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+# --- API 6: Cache Statistics ---
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """Report translation memory hit/miss statistics."""
+    return jsonify({"translation_memory": translation_memory.stats()})
     
+
+# --- API 7: Liveness and Readiness ---
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once every warm-up component is loaded, 503 (with per-component state) before."""
+    ready = all(state == "ready" for state in readiness.values())
+    return jsonify({"ready": ready, "components": readiness}), 200 if ready else 503
+
+
 if __name__ == '__main__':
+    start_warm_up()  # 🔹 Load configured models in the background; /readyz turns 200 when done
     serve(app, host="0.0.0.0", port=5000, threads=4)
\ No newline at end of file
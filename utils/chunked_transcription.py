@@ -0,0 +1,232 @@
+import os
+import sys
+import threading
+import multiprocessing
+import numpy as np
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config import (
+    TRANSCRIPTION_ENGINE, TRANSCRIPTION_WORKERS, TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_MAX_POOLS, WARMUP_LANGUAGE
+)
+from utils.media import SAMPLE_RATE
+from utils.transcription_engines import tier_model_size
+
+# 🔹 Energy-based voice activity detection on 30 ms frames
+VAD_FRAME_SECONDS = 0.03
+VAD_THRESHOLD_DB = 10.0          # Frames this far above the noise floor count as speech
+VAD_MIN_SILENCE_SECONDS = 0.3    # Shorter pauses are not used as cut points
+VAD_BLOCK_SECONDS = 60           # Energy is computed block by block so memory-mapped audio stays on disk
+
+
+def frame_energies(audio, sample_rate=SAMPLE_RATE):
+    """
+    Return the energy (dB) of every VAD frame of `audio`.
+    """
+    frame = int(VAD_FRAME_SECONDS * sample_rate)
+    block = frame * int(VAD_BLOCK_SECONDS / VAD_FRAME_SECONDS)
+    energies = []
+    for start in range(0, len(audio) - frame + 1, block):
+        samples = np.asarray(audio[start:start + block], dtype=np.float32)
+        frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+        energies.append(10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10))
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE):
+    """
+    Return a boolean speech flag per VAD frame, relative to the recording's own noise floor.
+    """
+    energies = frame_energies(audio, sample_rate)
+    if not len(energies):
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(energies, 10)
+    return energies > noise_floor + VAD_THRESHOLD_DB
+
+
+def silence_midpoints(speech):
+    """
+    Return the midpoint (seconds) of every silent run of at least VAD_MIN_SILENCE_SECONDS.
+    """
+    min_frames = int(VAD_MIN_SILENCE_SECONDS / VAD_FRAME_SECONDS)
+    padded = np.concatenate(([True], speech, [True])).astype(np.int8)
+    changes = np.diff(padded)
+    starts = np.flatnonzero(changes == -1)   # speech → silence
+    ends = np.flatnonzero(changes == 1)      # silence → speech
+    return [(start + end) / 2 * VAD_FRAME_SECONDS for start, end in zip(starts, ends) if end - start >= min_frames]
+
+
+def plan_audio_chunks(audio, chunk_seconds=TRANSCRIPTION_CHUNK_SECONDS, sample_rate=SAMPLE_RATE):
+    """
+    Split `audio` into (start, end) sample ranges of roughly `chunk_seconds`, cutting in the
+    middle of the silence closest to each target boundary so no word is split.
+    The VAD only chooses cut points: every chunk is kept, since quiet speech can fall under
+    its threshold, and Whisper's own no-speech check skips chunks that really are silent.
+    """
+    duration = len(audio) / sample_rate
+    speech = detect_speech(audio, sample_rate)
+    candidates = np.array(silence_midpoints(speech))
+
+    cuts, start = [], 0.0
+    while duration - start > chunk_seconds * 1.5:
+        target = start + chunk_seconds
+        window = candidates[(candidates >= start + chunk_seconds / 2) & (candidates <= start + chunk_seconds * 1.5)]
+        cut = float(window[np.argmin(np.abs(window - target))]) if len(window) else target
+        cuts.append((start, cut))
+        start = cut
+    cuts.append((start, duration))
+
+    return [(int(start * sample_rate), int(end * sample_rate)) for start, end in cuts]
+
+
+def stitch_results(results, offsets):
+    """
+    Merge per-chunk Whisper results into one, shifting timestamps by each chunk's offset (seconds).
+    """
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result["segments"]:
+            segment = dict(segment)
+            segment["id"] = len(segments)
+            segment["start"] += offset
+            segment["end"] += offset
+            segment["seek"] = segment.get("seek", 0) + int(offset * 100)  # Mel frames: 100 per second
+            if segment.get("words"):
+                segment["words"] = [
+                    {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                    for word in segment["words"]
+                ]
+            segments.append(segment)
+
+    languages = Counter(result["language"] for result in results if result.get("language"))
+    return {
+        "text": "".join(result["text"] for result in results),
+        "segments": segments,
+        "language": languages.most_common(1)[0][0] if languages else None
+    }
+
+
+# --- Worker processes: each loads its Whisper model once, when it starts ---
+_worker_engine = None
+_worker_model_size = None
+
+
+def _init_worker(engine_name, model_size, threads):
+    global _worker_engine, _worker_model_size
+    from utils.transcription_engines import TRANSCRIPTION_ENGINES
+    # Split the cores between workers instead of oversubscribing
+    _worker_engine = TRANSCRIPTION_ENGINES[engine_name](cpu_threads=threads)
+    _worker_model_size = model_size
+    _worker_engine.models.preload([model_size])
+
+
+def _ping(_):
+    return os.getpid()
+
+
+def _transcribe_chunk(job):
+    samples, options = job
+    result = _worker_engine.transcribe(samples, _worker_model_size, **options)
+    return {"text": result["text"], "segments": result["segments"], "language": result.get("language")}
+
+
+class _Pool:
+    def __init__(self, executor):
+        self.executor = executor
+        self.users = 0
+
+
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _evict_idle_pools(max_pools):
+    """
+    Shut down least recently used idle pools until at most `max_pools` remain (call with the lock held).
+    Pools in use are never shut down, so the limit can be exceeded while they finish.
+    """
+    for key in list(_pools):
+        if len(_pools) <= max_pools:
+            break
+        if _pools[key].users == 0:
+            print(f"🧹 Stopping transcription workers: {key[0]}/{key[1]}")
+            _pools.pop(key).executor.shutdown(wait=False)
+
+
+@contextmanager
+def transcription_pool(model_size, engine=TRANSCRIPTION_ENGINE, workers=TRANSCRIPTION_WORKERS,
+                       max_pools=TRANSCRIPTION_MAX_POOLS):
+    """
+    Check out the shared worker pool for (`engine`, `model_size`), starting it on first use.
+    Each pool keeps a model loaded in every worker, so at most `max_pools` are kept running.
+    Workers are spawned rather than forked: the server process may already hold torch thread pools.
+    """
+    key = (engine, model_size)
+    with _pools_lock:
+        if key not in _pools:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            _pools[key] = _Pool(ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(engine, model_size, threads)
+            ))
+        pool = _pools[key]
+        _pools.move_to_end(key)
+        pool.users += 1
+        _evict_idle_pools(max_pools)
+    try:
+        yield pool.executor
+    finally:
+        with _pools_lock:
+            pool.users -= 1
+            _evict_idle_pools(max_pools)
+
+
+def start_transcription_workers(model_size=None, engine=TRANSCRIPTION_ENGINE, workers=TRANSCRIPTION_WORKERS):
+    """
+    Start the worker processes for `model_size` (default: the default tier's model for
+    WARMUP_LANGUAGE audio) and wait until they have loaded the model.
+    """
+    with transcription_pool(model_size or tier_model_size(language=WARMUP_LANGUAGE), engine, workers) as pool:
+        list(pool.map(_ping, range(workers)))
+
+
+def map_bounded(pool, fn, jobs, max_in_flight):
+    """
+    Like `pool.map`, but takes `jobs` from an iterator lazily and keeps at most `max_in_flight`
+    submitted, so only that many jobs' arguments are in memory (and in the call queue) at once.
+    """
+    pending, results = deque(), []
+    try:
+        for job in jobs:
+            pending.append(pool.submit(fn, job))
+            if len(pending) >= max_in_flight:
+                results.append(pending.popleft().result())  # Wait before taking the next job
+        while pending:
+            results.append(pending.popleft().result())
+    finally:
+        for future in pending:
+            future.cancel()
+    return results
+
+
+def transcribe_chunked(audio, model_size="base", engine=TRANSCRIPTION_ENGINE,
+                       chunk_seconds=TRANSCRIPTION_CHUNK_SECONDS, **options):
+    """
+    Transcribe long audio in parallel: split it on silences, transcribe the chunks in the
+    worker pool, and stitch the segments back together on the original timeline.
+    Chunks are copied out of `audio` only when submitted, so memory-mapped recordings stay on disk.
+    """
+    chunks = plan_audio_chunks(audio, chunk_seconds)
+    print(f"🧩 Transcribing {len(chunks)} chunks across {TRANSCRIPTION_WORKERS} workers...")
+
+    jobs = ((np.array(audio[start:end], dtype=np.float32), options) for start, end in chunks)
+    with transcription_pool(model_size, engine) as pool:
+        # One chunk queued per worker beyond the ones being transcribed
+        results = map_bounded(pool, _transcribe_chunk, jobs, max_in_flight=2 * TRANSCRIPTION_WORKERS)
+    return stitch_results(results, [start / SAMPLE_RATE for start, _ in chunks])
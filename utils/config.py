@@ -15,3 +15,112 @@ LANGUAGE_CODES = {
     "Spanish": "es",
     "German": "de"
 }
+
+# 🔹 ISO 639-2 codes used to tag muxed subtitle tracks
+SUBTITLE_TRACK_LANGUAGES = {
+    "en": "eng",
+    "fr": "fra",
+    "it": "ita",
+    "es": "spa",
+    "de": "deu"
+}
+
+# 🔹 Subtitle output modes: burn into pixels, mux as a selectable MP4 track, or WebVTT sidecar
+SUBTITLE_MODES = ("burn", "soft", "vtt")
+
+# 🔹 Whisper model registry
+# Comma-separated model sizes loaded when the backend starts (e.g. "base,small"); empty = the models
+# the default tier uses: its multilingual model (language detection) and the one for WARMUP_LANGUAGE audio
+WHISPER_PRELOAD_MODELS = [size.strip() for size in os.getenv("WHISPER_PRELOAD_MODELS", "").split(",") if size.strip()]
+# Evict least recently used models once loaded weights exceed this many MB (0 = no limit)
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "0")) or None
+# Transcription engine: "whisper" (openai-whisper, fp32) or "faster-whisper" (CTranslate2)
+TRANSCRIPTION_ENGINE = os.getenv("TRANSCRIPTION_ENGINE", "whisper")
+# Weight precision for faster-whisper on CPU ("int8", "int8_float32", "float32")
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+
+# 🔹 Transcription quality tiers: model size and decoding settings per speed/accuracy trade-off
+#    beam_size None = greedy decoding; several temperatures = fall back to sampling on failed decodes;
+#    english_only = switch to the `.en` model when the detected language is English
+TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+TRANSCRIPTION_TIERS = {
+    "draft": {"model_size": "tiny", "beam_size": None, "temperature": 0.0,
+              "condition_on_previous_text": False, "english_only": True},
+    "standard": {"model_size": "base", "beam_size": None, "temperature": TEMPERATURE_FALLBACK,
+                 "condition_on_previous_text": True, "english_only": True},
+    "accurate": {"model_size": "small", "beam_size": 5, "best_of": 5, "temperature": TEMPERATURE_FALLBACK,
+                 "condition_on_previous_text": True, "english_only": True}
+}
+TRANSCRIPTION_TIER = os.getenv("TRANSCRIPTION_TIER", "standard")
+
+# 🔹 Startup warm-up: models loaded in the background after the server starts
+#    ("whisper", "summarizer", "whisper_workers" for the long-audio process pool).
+# Everything else is loaded on first use; /readyz reports 200 once these are loaded.
+WARMUP_COMPONENTS = [name.strip() for name in os.getenv("WARMUP_COMPONENTS", "whisper").split(",") if name.strip()]
+
+# 🔹 Transcription cache (Whisper results keyed by audio content + model + options)
+TRANSCRIPTION_CACHE_DIR = os.path.join(RESULTS_DIR, "cache", "transcriptions")
+TRANSCRIPTION_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MEMORY_ENTRIES", "32"))
+TRANSCRIPTION_CACHE_MAX_MB = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "512"))
+
+# 🔹 Long-audio mode: split on silences and transcribe chunks in a pool of Whisper worker processes
+TRANSCRIPTION_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+# At most this many worker pools (one per engine + model size) stay running; idle ones are shut down LRU-first
+TRANSCRIPTION_MAX_POOLS = int(os.getenv("TRANSCRIPTION_MAX_POOLS", "2"))
+# Language the warm-up expects, so English-only tiers load their `.en` model and worker pool
+WARMUP_LANGUAGE = os.getenv("WARMUP_LANGUAGE", "en")
+# Audio at least this long is chunked (shorter audio is a single Whisper call)
+TRANSCRIPTION_PARALLEL_MIN_SECONDS = float(os.getenv("TRANSCRIPTION_PARALLEL_MIN_SECONDS", "600"))
+# Target chunk length; cuts are moved to the nearest silence
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "300"))
+# Streaming transcripts decode silence-aligned windows of about this length, one at a time
+TRANSCRIPT_STREAM_WINDOW_SECONDS = float(os.getenv("TRANSCRIPT_STREAM_WINDOW_SECONDS", "30"))
+
+# 🔹 Background jobs: each job (and each synchronous request) gets its own workspace
+JOBS_DIR = os.path.join(RESULTS_DIR, "jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+# How often expired workspaces (background jobs and synchronous requests) are deleted
+JOB_PRUNE_INTERVAL_MINUTES = float(os.getenv("JOB_PRUNE_INTERVAL_MINUTES", "30"))
+
+# 🔹 Media tools
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+# Decoded audio longer than this is spilled to a memory-mapped file in the job workspace
+AUDIO_MEMMAP_THRESHOLD_SECONDS = int(os.getenv("AUDIO_MEMMAP_THRESHOLD_SECONDS", "1200"))
+
+# 🔹 Subtitle burn-in encoder settings (single H.264 pass, original audio stream-copied)
+BURN_IN_VIDEO_CODEC = os.getenv("BURN_IN_VIDEO_CODEC", "libx264")
+BURN_IN_PRESET = os.getenv("BURN_IN_PRESET", "veryfast")
+BURN_IN_CRF = int(os.getenv("BURN_IN_CRF", "20"))
+
+# 🔹 Parallel burn-in: worker processes, and the minimum video length each worker gets
+BURN_IN_WORKERS = int(os.getenv("BURN_IN_WORKERS", str(os.cpu_count() or 1)))
+BURN_IN_MIN_CHUNK_SECONDS = float(os.getenv("BURN_IN_MIN_CHUNK_SECONDS", "30"))
+# Stream-copy GOPs without subtitles and re-encode only the ones that show a cue
+BURN_IN_SMART_RENDER = os.getenv("BURN_IN_SMART_RENDER", "0") == "1"
+
+# 🔹 Translation: provider ("google", or "echo" for offline runs), batching and concurrency
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_RETRIES = int(os.getenv("TRANSLATION_RETRIES", "3"))
+TRANSLATION_BATCH_CHARS = int(os.getenv("TRANSLATION_BATCH_CHARS", "4500"))
+TRANSLATION_MAX_REQUESTS_PER_SECOND = float(os.getenv("TRANSLATION_MAX_REQUESTS_PER_SECOND", "5"))
+
+# 🔹 Translation memory (SQLite, with an in-process LRU in front)
+TRANSLATION_MEMORY_PATH = os.path.join(RESULTS_DIR, "cache", "translation_memory.sqlite3")
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+TRANSLATION_MEMORY_LRU_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_LRU_ENTRIES", "10000"))
+
+# 🔹 Summarization: T5 input window (tokens) and windows per batched generate call
+SUMMARY_WINDOW_TOKENS = int(os.getenv("SUMMARY_WINDOW_TOKENS", "512"))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+# How long the summarization worker waits to fill a batch with concurrent requests
+SUMMARY_BATCH_WAIT_MS = int(os.getenv("SUMMARY_BATCH_WAIT_MS", "20"))
+# Summarizer weights and inference engine: "pytorch" (fp32), "int8" (dynamic quantization) or "onnx"
+SUMMARY_MODEL_NAME = os.getenv("SUMMARY_MODEL_NAME", "t5-base")
+SUMMARY_ENGINE = os.getenv("SUMMARY_ENGINE", "pytorch")
+SUMMARY_ONNX_DIR = os.path.join(RESULTS_DIR, "cache", "onnx")
+# Summaries cached by transcript hash + model + generation settings (the artifact file is reused)
+SUMMARY_CACHE_DIR = os.path.join(RESULTS_DIR, "cache", "summaries")
+SUMMARY_CACHE_MEMORY_ENTRIES = int(os.getenv("SUMMARY_CACHE_MEMORY_ENTRIES", "64"))
@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config import (  # ✅ Import shared directories
+    JOBS_DIR, JOB_WORKERS, JOB_RETENTION_HOURS, JOB_PRUNE_INTERVAL_MINUTES
+)
+
+
+def create_workspace(job_id=None):
+    """
+    Create an isolated working directory for one job or request.
+    Every intermediate and result file of the job is written inside it.
+    """
+    workspace = os.path.join(JOBS_DIR, job_id or uuid.uuid4().hex)
+    os.makedirs(workspace, exist_ok=True)
+    return workspace
+
+
+def no_progress(stage, fraction=None):
+    """
+    Default progress callback for pipelines run outside the job manager.
+    """
+    pass
+
+
+class Job:
+    """
+    State of one background job, as reported by `GET /jobs/<id>`.
+    """
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.workspace = create_workspace(self.id)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._lock = threading.Lock()
+
+    def report(self, stage, fraction=None):
+        """
+        Progress callback handed to the pipeline functions.
+        """
+        with self._lock:
+            self.stage = stage
+            if fraction is not None:
+                self.progress = round(min(max(fraction, 0.0), 1.0), 3)
+            self.updated_at = time.time()
+        print(f"🔄 Job {self.id}: {stage}")
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.stage = status
+            self.result = result
+            self.error = error
+            if status == "completed":
+                self.progress = 1.0
+            self.updated_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "type": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "result": self.result,
+                "error": self.error,
+                "workspace": self.workspace,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at
+            }
+
+
+class JobManager:
+    """
+    Runs pipeline functions in a bounded thread pool, one workspace per job.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, retention_hours=JOB_RETENTION_HOURS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._retention_seconds = retention_hours * 3600
+        self._pruner = None
+
+    def submit(self, kind, func, **params):
+        """
+        Queue `func(workspace=..., progress=..., **params)` and return the Job immediately.
+        `func` returns a JSON-serializable result dict or raises on failure.
+        """
+        self._prune()
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def start_pruning(self, interval_minutes=JOB_PRUNE_INTERVAL_MINUTES):
+        """
+        Prune expired jobs and workspaces periodically on a daemon thread (idempotent).
+        Synchronous requests also write workspaces, so pruning cannot rely on `submit` alone.
+        """
+        with self._lock:
+            if self._pruner is not None:
+                return
+            self._pruner = threading.Thread(target=self._prune_forever, args=(interval_minutes * 60,),
+                                            name="workspace-pruner", daemon=True)
+        self._pruner.start()
+
+    def _prune_forever(self, interval_seconds):
+        while True:
+            try:
+                self._prune()
+            except Exception as e:
+                print(f"❌ Error pruning workspaces: {e}")
+            time.sleep(interval_seconds)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func):
+        with job._lock:
+            job.status = "running"
+        try:
+            result = func(workspace=job.workspace, progress=job.report, **job.params)
+            job._finish("completed", result=result)
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {e}")
+            job._finish("failed", error=str(e))
+
+    def _prune(self):
+        """
+        Forget finished jobs and delete workspaces older than the retention period.
+        """
+        cutoff = time.time() - self._retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.status in ("completed", "failed") and job.updated_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+            active = set(self._jobs)
+
+        if not os.path.isdir(JOBS_DIR):
+            return
+        for name in os.listdir(JOBS_DIR):
+            path = os.path.join(JOBS_DIR, name)
+            try:
+                if name not in active and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from fractions import Fraction
+import numpy as np
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config import (
+    FFMPEG_BINARY, FFPROBE_BINARY, AUDIO_MEMMAP_THRESHOLD_SECONDS,
+    BURN_IN_VIDEO_CODEC, BURN_IN_PRESET, BURN_IN_CRF
+)
+
+# 🔹 Whisper consumes 16 kHz mono float32 PCM
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 4
+
+# 🔹 Audio codecs that can be stream-copied into an MP4 container as-is
+MP4_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3", "alac"}
+
+# 🔹 ffprobe H.264 profile names and the libx264 profile that reproduces each
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+
+
+### **🔹 Function: Decode Audio Straight to Whisper's Input Format**
+def decode_audio(video_path, spill_path=None, threshold_seconds=AUDIO_MEMMAP_THRESHOLD_SECONDS):
+    """
+    Demux and resample the audio track in a single ffmpeg pass, directly to 16 kHz mono float32.
+
+    Short clips are returned as an in-memory NumPy array. Once the decoded audio grows past
+    `threshold_seconds` and `spill_path` is given, samples are streamed to that file instead
+    and returned as a copy-on-write memory map, so hour-long recordings never sit in RAM twice.
+    """
+    cmd = [
+        FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le", "-"
+    ]
+    threshold_bytes = threshold_seconds * SAMPLE_RATE * BYTES_PER_SAMPLE
+
+    # stderr goes to a file: a corrupt input can log more than a pipe holds while stdout is still being read
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+    buffer = bytearray()
+    spill = None
+    size = 0
+    try:
+        for chunk in iter(lambda: process.stdout.read(1024 * 1024), b""):
+            if spill is None and spill_path and size + len(chunk) > threshold_bytes:
+                spill = open(spill_path, "wb")
+                spill.write(buffer)
+                buffer = bytearray()
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                buffer.extend(chunk)
+            size += len(chunk)
+        process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode("utf-8", errors="replace")
+    finally:
+        stderr_file.close()
+        if spill is not None:
+            spill.close()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.strip()}")
+
+    samples = size // BYTES_PER_SAMPLE
+    if samples == 0:
+        raise RuntimeError("No audio samples decoded")
+
+    if spill is not None:
+        return np.memmap(spill_path, dtype=np.float32, mode="c", shape=(samples,))
+    return np.frombuffer(buffer, dtype=np.float32, count=samples)
+
+
+### **🔹 Function: Probe Video Stream Properties**
+def probe_video(video_path):
+    """
+    Return the properties of the first video stream and first audio stream of a file:
+    width, height (after rotation), fps (float), frame_rate (exact fraction string),
+    duration, video_codec, pix_fmt and audio_codec (None when there is no audio).
+    The H.264 settings a splice has to match are included too: profile, level, refs,
+    has_b_frames, sample_aspect_ratio, timescale, rotation, field_order and constant_frame_rate.
+    """
+    cmd = [
+        FFPROBE_BINARY, "-v", "error", "-print_format", "json",
+        "-show_streams", "-show_format", video_path
+    ]
+    info = json.loads(subprocess.run(cmd, capture_output=True, check=True).stdout)
+
+    streams = info.get("streams", [])
+    video = next((st for st in streams if st.get("codec_type") == "video"), None)
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+    if video is None:
+        raise RuntimeError(f"No video stream found in {video_path}")
+
+    width, height = int(video["width"]), int(video["height"])
+    rotation = int(video.get("tags", {}).get("rotate", 0) or 0)
+    for side_data in video.get("side_data_list", []):
+        rotation = int(side_data.get("rotation", rotation) or rotation)
+    if abs(rotation) % 180 == 90:
+        width, height = height, width  # ffmpeg auto-rotates decoded frames
+
+    frame_rate = video.get("avg_frame_rate") or video.get("r_frame_rate") or "25/1"
+    if Fraction(frame_rate) == 0:
+        frame_rate = video.get("r_frame_rate", "25/1")
+
+    return {
+        "width": width,
+        "height": height,
+        "fps": float(Fraction(frame_rate)),
+        "frame_rate": frame_rate,
+        "duration": float(info.get("format", {}).get("duration") or video.get("duration") or 0.0),
+        "video_codec": video.get("codec_name"),
+        "pix_fmt": video.get("pix_fmt"),
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "profile": video.get("profile"),
+        "level": video.get("level"),
+        "refs": int(video.get("refs") or 1),
+        "has_b_frames": int(video.get("has_b_frames") or 0),
+        "sample_aspect_ratio": video.get("sample_aspect_ratio"),
+        "timescale": Fraction(video["time_base"]).denominator if video.get("time_base") else None,
+        "rotation": rotation,
+        "field_order": video.get("field_order"),
+        "constant_frame_rate": video.get("avg_frame_rate") == video.get("r_frame_rate")
+    }
+
+
+def matching_encoder_options(info):
+    """
+    libx264 options that reproduce the source's stream-level H.264 settings (profile, level,
+    reference frames, B-frame reordering), so segments we encode can sit between stream-copied
+    GOPs of the source in one MP4 track. `info` comes from `probe_video`.
+    """
+    x264_params = [f"ref={info['refs']}"]
+    if info["has_b_frames"] == 0:
+        x264_params.append("bframes=0")
+    elif info["has_b_frames"] == 1:
+        x264_params.append("b-pyramid=none")  # B-frames without pyramid reorder by one frame
+    options = ["-profile:v", X264_PROFILES[info["profile"]], "-x264-params", ":".join(x264_params)]
+    if info["level"] and info["level"] > 0:
+        options += ["-level", f"{info['level'] / 10:.1f}"]
+    return options
+
+
+### **🔹 Function: Stream Decoded Frames from ffmpeg**
+def read_frames(video_path, width, height, start=None, duration=None):
+    """
+    Yield decoded frames as H×W×3 BGR uint8 arrays, one at a time, from an ffmpeg pipe.
+    `start` / `duration` (seconds) restrict decoding to a time range.
+    Raises RuntimeError if ffmpeg fails, so a decode error cannot pass for the end of the video.
+    """
+    cmd = [FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", video_path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.6f}"]
+    cmd += ["-map", "0:v:0", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+
+    frame_size = width * height * 3
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                finished = True
+                break
+            # bytearray keeps the frame writable so subtitles can be blended in place
+            yield np.frombuffer(bytearray(data), dtype=np.uint8).reshape(height, width, 3)
+    finally:
+        process.stdout.close()
+        if not finished and process.poll() is None:
+            process.kill()  # The caller stopped reading early
+        returncode = process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode("utf-8", errors="replace")
+        stderr_file.close()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode video: {stderr.strip()}")
+
+
+### **🔹 Class: Pipe Frames into a Single H.264 Encode**
+class FrameWriter:
+    """
+    Encode raw BGR frames written to ffmpeg's stdin into an H.264 MP4.
+
+    When `audio_source` is given, its first audio track is muxed in the same pass:
+    stream-copied when MP4 accepts the codec, otherwise transcoded to AAC.
+    Use as a context manager so the encoder is always closed (or killed on error).
+    Writing to a `.ts` path produces MPEG-TS segments that concatenate losslessly.
+    `encoder_options` are extra ffmpeg output options (see `matching_encoder_options`).
+    """
+
+    def __init__(self, output_path, width, height, frame_rate, audio_source=None, audio_codec=None,
+                 video_codec=BURN_IN_VIDEO_CODEC, preset=BURN_IN_PRESET, crf=BURN_IN_CRF, threads=None,
+                 encoder_options=None, sample_aspect_ratio=None):
+        self.output_path = output_path
+        self.frame_shape = (height, width, 3)
+
+        cmd = [
+            FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(frame_rate),
+            "-i", "-"
+        ]
+        if audio_source:
+            cmd += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?"]
+            cmd += ["-c:a", "copy" if audio_codec in MP4_AUDIO_CODECS else "aac"]
+        video_filter = "pad=ceil(iw/2)*2:ceil(ih/2)*2"  # yuv420p needs even dimensions
+        if sample_aspect_ratio and sample_aspect_ratio not in ("0:1", "1:1", "N/A"):
+            video_filter += f",setsar={sample_aspect_ratio.replace(':', '/')}"  # Raw frames carry no SAR
+        cmd += [
+            "-vf", video_filter,
+            "-c:v", video_codec, "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p"
+        ]
+        cmd += encoder_options or []
+        if threads:
+            cmd += ["-threads", str(threads)]
+        if output_path.endswith(".mp4"):
+            cmd += ["-movflags", "+faststart"]
+        cmd.append(output_path)
+
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, frame):
+        self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+
+    def close(self):
+        """
+        Flush the encoder and wait for it; raises if ffmpeg failed.
+        """
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._process.wait()
+        self._stderr.seek(0)
+        message = self._stderr.read().decode("utf-8", errors="replace").strip()
+        self._stderr.close()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg encode failed: {message}")
+        return self.output_path
+
+    def abort(self):
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+### **🔹 Function: Remux Subtitle Tracks without Re-encoding**
+def mux_subtitle_tracks(video_path, subtitle_tracks, output_path, audio_codec=None):
+    """
+    Mux subtitle files into an MP4 as `mov_text` tracks alongside stream-copied video and audio.
+    `subtitle_tracks` is a list of (iso639_2_language, subtitle_path); the first track is the default.
+    """
+    cmd = [FFMPEG_BINARY, "-y", "-nostdin", "-hide_banner", "-loglevel", "error", "-i", video_path]
+    for _, subtitle_path in subtitle_tracks:
+        cmd += ["-i", subtitle_path]
+
+    cmd += ["-map", "0:v:0", "-map", "0:a:0?"]
+    for i in range(len(subtitle_tracks)):
+        cmd += ["-map", f"{i + 1}:0"]
+
+    cmd += ["-c:v", "copy", "-c:a", "copy" if audio_codec in MP4_AUDIO_CODECS else "aac", "-c:s", "mov_text"]
+    for i, (language, _) in enumerate(subtitle_tracks):
+        cmd += [f"-metadata:s:s:{i}", f"language={language}"]
+        cmd += [f"-disposition:s:{i}", "default" if i == 0 else "0"]
+    cmd += ["-movflags", "+faststart", output_path]
+
+    completed = subprocess.run(cmd, capture_output=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffmpeg remux failed: {completed.stderr.decode('utf-8', errors='replace').strip()}")
+    return output_path
+
+
+### **🔹 Function: List Keyframe Timestamps**
+def probe_keyframes(video_path, closed_gop_only=False):
+    """
+    Return the sorted presentation times (seconds) of the video's keyframes.
+    Reads packet flags only, so nothing is decoded.
+
+    With `closed_gop_only`, keyframes followed (in decode order) by frames shown before them are
+    skipped: those are open-GOP recovery points whose leading frames reference the previous GOP,
+    so the video cannot be cut there without re-encoding.
+    """
+    cmd = [
+        FFPROBE_BINARY, "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=print_section=0", video_path
+    ]
+    output = subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+
+    # Packets are listed in decode order
+    keyframes, candidate, clean = [], None, True
+    for line in output.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) < 2 or parts[0] in ("", "N/A"):
+            continue
+        pts = float(parts[0])
+        if "K" in parts[1]:
+            if candidate is not None and (clean or not closed_gop_only):
+                keyframes.append(candidate)
+            candidate, clean = pts, True
+        elif candidate is not None and pts < candidate:
+            clean = False
+    if candidate is not None and (clean or not closed_gop_only):
+        keyframes.append(candidate)
+    return sorted(set(keyframes))
+
+
+### **🔹 Function: Cut a Keyframe-Aligned Range without Re-encoding**
+def copy_segment(video_path, output_path, start, duration):
+    """
+    Stream-copy the video of [start, start + duration) into an MPEG-TS segment.
+    `start` must be a keyframe time for the cut to be clean.
+    """
+    cmd = [
+        FFMPEG_BINARY, "-y", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{duration:.6f}",
+        "-map", "0:v:0", "-c:v", "copy", "-f", "mpegts", output_path
+    ]
+    completed = subprocess.run(cmd, capture_output=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffmpeg copy failed: {completed.stderr.decode('utf-8', errors='replace').strip()}")
+    return output_path
+
+
+### **🔹 Function: Concatenate Segments Losslessly**
+def concat_segments(segment_paths, output_path, audio_source=None, audio_codec=None, timescale=None):
+    """
+    Join video segments encoded with identical settings into one MP4 without re-encoding,
+    optionally muxing the first audio track of `audio_source` in the same pass.
+    `timescale` sets the MP4 video track timescale (use the source's to keep its timestamps exact).
+    """
+    list_path = output_path + ".concat.txt"
+    with open(list_path, "w", encoding="utf-8") as list_file:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+
+    cmd = [
+        FFMPEG_BINARY, "-y", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path
+    ]
+    if audio_source:
+        cmd += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?"]
+        cmd += ["-c:a", "copy" if audio_codec in MP4_AUDIO_CODECS else "aac"]
+    cmd += ["-c:v", "copy"]
+    if timescale:
+        cmd += ["-video_track_timescale", str(timescale)]
+    cmd += ["-movflags", "+faststart", output_path]
+
+    try:
+        completed = subprocess.run(cmd, capture_output=True)
+    finally:
+        os.remove(list_path)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffmpeg concat failed: {completed.stderr.decode('utf-8', errors='replace').strip()}")
+    return output_path
+
+
+### **🔹 Function: Check that a Video Decodes without Errors**
+def decodes_cleanly(video_path):
+    """
+    Decode the whole video stream and return True if ffmpeg reported no errors.
+    """
+    cmd = [
+        FFMPEG_BINARY, "-nostdin", "-hide_banner", "-v", "error",
+        "-i", video_path, "-map", "0:v:0", "-f", "null", "-"
+    ]
+    completed = subprocess.run(cmd, capture_output=True)
+    return completed.returncode == 0 and not completed.stderr.strip()
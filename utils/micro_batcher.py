@@ -0,0 +1,78 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and processes them in batches.
+
+    A single worker thread takes the first waiting item, keeps gathering items for up to
+    `max_wait_ms` (or until `max_batch_size` is reached), then calls
+    `process_batch(items, key)` once per group of items that share the same `key`
+    (e.g. identical generation parameters). Each caller gets its own result back
+    through a Future.
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=20, name="micro-batcher"):
+        self._process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._name = name
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._worker.start()
+
+    def submit(self, item, key=None):
+        """
+        Queue `item` and return a Future resolving to its result.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, key, future))
+        return future
+
+    def map(self, items, key=None):
+        """
+        Submit every item and wait for all results, in order.
+        """
+        futures = [self.submit(item, key) for item in items]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+
+            groups = {}
+            for item, key, future in pending:
+                groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                items = [item for item, _ in entries]
+                try:
+                    results = self._process_batch(items, key)
+                    for (_, future), result in zip(entries, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for _, future in entries:
+                        future.set_exception(e)
@@ -0,0 +1,158 @@
+import gc
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def estimate_model_bytes(model):
+    """
+    Estimate the resident size of a PyTorch model from its parameters and buffers.
+    """
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class _Entry:
+    def __init__(self):
+        self.model = None
+        self.size = 0
+        self.error = None
+        self.users = 0
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models, keyed by name (e.g. Whisper model size).
+
+    Each model is loaded once and shared by all server threads. `use()` also holds
+    a per-model lock while the caller runs inference, because Whisper installs
+    KV-cache hooks on the shared modules during decoding and is not re-entrant.
+    When a memory budget is set, least recently used idle models are evicted.
+    """
+
+    def __init__(self, loader, memory_budget_mb=None, size_of=estimate_model_bytes):
+        self._loader = loader
+        self._budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self._size_of = size_of
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _checkout(self, name):
+        """
+        Return the loaded entry for `name` with its user count incremented.
+        The first caller loads the model; concurrent callers wait for it.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                owner = entry is None
+                if owner:
+                    entry = _Entry()
+                    self._entries[name] = entry
+                else:
+                    self._entries.move_to_end(name)
+
+            if owner:
+                try:
+                    print(f"📦 Loading model: {name}")
+                    entry.model = self._loader(name)
+                    entry.size = self._size_of(entry.model)
+                except Exception as e:
+                    entry.error = e
+                    with self._lock:
+                        self._entries.pop(name, None)
+                    raise
+                finally:
+                    entry.ready.set()
+            else:
+                entry.ready.wait()
+                if entry.error is not None:
+                    raise entry.error
+
+            with self._lock:
+                # The entry may have been evicted between loading and checkout
+                if self._entries.get(name) is entry:
+                    entry.users += 1
+                    break
+
+        if owner:
+            self._enforce_budget(keep=name)
+        return entry
+
+    def _release(self, entry):
+        with self._lock:
+            entry.users -= 1
+        self._enforce_budget()
+
+    def _enforce_budget(self, keep=None):
+        if self._budget is None:
+            return
+        evicted = []
+        with self._lock:
+            total = sum(e.size for e in self._entries.values())
+            for name, entry in list(self._entries.items()):
+                if total <= self._budget:
+                    break
+                if name == keep or entry.users or not entry.ready.is_set():
+                    continue
+                del self._entries[name]
+                total -= entry.size
+                evicted.append(name)
+        if evicted:
+            print(f"🧹 Evicted models over memory budget: {', '.join(evicted)}")
+            gc.collect()
+
+    def get(self, name):
+        """
+        Return the model for `name`, loading it on first use.
+        """
+        entry = self._checkout(name)
+        self._release(entry)
+        return entry.model
+
+    @contextmanager
+    def use(self, name):
+        """
+        Borrow the model for `name` exclusively for the duration of the block.
+        A model in use is never evicted.
+        """
+        entry = self._checkout(name)
+        try:
+            with entry.lock:
+                yield entry.model
+        finally:
+            self._release(entry)
+
+    def preload(self, names):
+        """
+        Load every model in `names` ahead of the first request.
+        """
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"❌ Error preloading model {name}: {e}")
+
+    def evict(self, name):
+        """
+        Drop `name` from the registry. Returns False if it is missing or in use.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.users:
+                return False
+            del self._entries[name]
+        gc.collect()
+        return True
+
+    def loaded(self):
+        """
+        Return a mapping of loaded model names to their estimated size in bytes.
+        """
+        with self._lock:
+            return {name: e.size for name, e in self._entries.items() if e.ready.is_set()}
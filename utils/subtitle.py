@@ -1,52 +1,67 @@
 import os
 import sys
-import cv2
-import numpy as np
+import copy
 import pysrt
-from moviepy import *
 from datetime import timedelta
-from deep_translator import GoogleTranslator
-from PIL import Image, ImageDraw, ImageFont
 
 # 🔹 Ensure Python can find `utils/`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.config import RESULTS_DIR  # ✅ Use shared results directory
-from utils.transcript import download_video, extract_audio, transcribe_audio  # ✅ Reuse transcript functions
+from utils.config import (  # ✅ Use shared results directory
+    RESULTS_DIR, SUBTITLE_TRACK_LANGUAGES, BURN_IN_WORKERS, BURN_IN_MIN_CHUNK_SECONDS, BURN_IN_SMART_RENDER
+)
+from utils.transcript import transcribe_video  # ✅ Reuse transcript pipeline
+from utils.jobs import create_workspace, no_progress
+from utils.translate import translate_segments, fan_out_languages, same_language
+from utils.translation_backends import get_translation_backend
+from utils.media import (
+    probe_video, probe_keyframes, mux_subtitle_tracks, matching_encoder_options, decodes_cleanly, X264_PROFILES
+)
+from utils.subtitle_render import (
+    SubtitleTrack, render_range, plan_chunks, plan_smart_segments, render_segments_parallel
+)
 
 # Ensure 'results' directory exists
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
 
 ### **🔹 Function: Translate Transcription**
-def translate_text(text, target_language="fr"):
+def translate_text(text, target_language="fr", backend=None):
     """
-    Translate text to the specified target language using Google Translate.
+    Translate text to the specified target language (Google Translate by default).
     """
-    translator = GoogleTranslator(source="auto", target=target_language)
-    return translator.translate(text)
+    backend = backend or get_translation_backend()
+    return backend.translate(text, "auto", target_language)
 
 
-def translate_transcription(transcription, target_language="fr"):
+def translate_transcription(transcription, target_language="fr", backend=None):
     """
-    Translate each segment in the transcription.
+    Translate each segment in the transcription (batched, several requests in parallel),
+    from the language Whisper detected ("auto" if detection failed).
     """
-    for segment in transcription["segments"]:
-        segment["text"] = translate_text(segment["text"], target_language)
+    segments = transcription["segments"]
+    source_language = transcription.get("language") or "auto"
+    translated = translate_segments([segment["text"] for segment in segments], target_language, source_language,
+                                    backend=backend)
+    for segment, text in zip(segments, translated):
+        segment["text"] = text
     return transcription
 
 
 ### **🔹 Function: Generate Subtitles in SRT Format**
-def generate_srt(transcription, srt_filename="subtitles.srt"):
+def generate_srt(transcription, srt_filename="subtitles.srt", output_dir=RESULTS_DIR):
     """
     Generate an SRT subtitle file from the transcribed text.
     """
     def format_timestamp(seconds):
-        td = timedelta(seconds=seconds)
-        timestamp = str(td).replace(".", ",")[:12] if "." in str(td) else str(td) + ",000"
-        return timestamp
-
-    srt_path = os.path.join(RESULTS_DIR, srt_filename)
+        # HH:MM:SS,mmm — strict players and ffmpeg's SRT demuxer need two-digit hours
+        milliseconds = int(round(timedelta(seconds=seconds).total_seconds() * 1000))
+        hours, remainder = divmod(milliseconds, 3600000)
+        minutes, remainder = divmod(remainder, 60000)
+        secs, millis = divmod(remainder, 1000)
+        return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+    srt_path = os.path.join(output_dir, srt_filename)
     srt_content = ""
 
     for i, segment in enumerate(transcription["segments"]):
@@ -62,111 +77,181 @@ def generate_srt(transcription, srt_filename="subtitles.srt"):
     return srt_path
 
 
-### **🔹 Function: Overlay Subtitles on Video**
-def overlay_subtitles(video_path, srt_path, output_filename="output_video.mp4"):
+### **🔹 Function: Convert SRT to WebVTT**
+def srt_to_vtt(srt_path, vtt_path=None):
     """
-    Overlay subtitles onto a video using OpenCV.
+    Write a WebVTT copy of an SRT file (sidecar captions for HTML5 players).
     """
-    video = cv2.VideoCapture(video_path)
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    frame_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = int(video.get(cv2.CAP_PROP_FPS))
-
-    output_path = os.path.join(RESULTS_DIR, output_filename)
-    out = cv2.VideoWriter(output_path, fourcc, fps, (frame_width, frame_height))
-
-    subs = pysrt.open(srt_path)
-    font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
-    font = ImageFont.truetype(font_path, 40)
-
-    max_width = frame_width - 100
-
-    while video.isOpened():
-        ret, frame = video.read()
-        if not ret:
-            break
-
-        frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(frame_pil)
-
-        current_time = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
-
-        for sub in subs:
-            start_time = sub.start.ordinal / 1000.0
-            end_time = sub.end.ordinal / 1000.0
-            if start_time <= current_time <= end_time:
-                text = sub.text
-                words = text.split()
-                lines = []
-                current_line = ""
-
-                for word in words:
-                    test_line = current_line + " " + word if current_line else word
-                    bbox = draw.textbbox((0, 0), test_line, font=font)
-                    text_width = bbox[2] - bbox[0]
-
-                    if text_width > max_width:
-                        lines.append(current_line)
-                        current_line = word
-                    else:
-                        current_line = test_line
-
-                lines.append(current_line)
+    vtt_path = vtt_path or os.path.splitext(srt_path)[0] + ".vtt"
+    with open(srt_path, "r", encoding="utf-8") as srt_file:
+        blocks = srt_file.read().strip().split("\n\n")
+
+    with open(vtt_path, "w", encoding="utf-8") as vtt_file:
+        vtt_file.write("WEBVTT\n\n")
+        for block in blocks:
+            lines = block.splitlines()
+            if lines and lines[0].strip().isdigit():
+                lines = lines[1:]  # Cue numbers are optional in WebVTT
+            if lines:
+                lines[0] = lines[0].replace(",", ".")  # 00:00:01,000 → 00:00:01.000
+                vtt_file.write("\n".join(lines) + "\n\n")
+
+    print(f"✅ WebVTT subtitles saved at: {vtt_path}")
+    return vtt_path
+
+
+### **🔹 Function: Add Selectable Subtitle Tracks (No Re-encode)**
+def mux_soft_subtitles(video_path, srt_paths, output_filename="video_with_subtitles.mp4", output_dir=RESULTS_DIR):
+    """
+    Mux one `mov_text` subtitle track per language into an MP4, stream-copying video and audio.
+    `srt_paths` maps language codes to SRT files; the first language is the default track.
+    """
+    info = probe_video(video_path)
+    output_path = os.path.join(output_dir, output_filename)
+    tracks = [(SUBTITLE_TRACK_LANGUAGES.get(language, "und"), path) for language, path in srt_paths.items()]
 
-                text_height = (bbox[3] - bbox[1] + 10) * len(lines)
-                position = (50, frame_height - text_height - 50)
-                y_offset = position[1]
+    mux_subtitle_tracks(video_path, tracks, output_path, audio_codec=info["audio_codec"])
+    print(f"✅ Video with subtitle tracks saved at: {output_path}")
+    return output_path
 
-                for line in lines:
-                    draw.text((position[0], y_offset), line, font=font, fill=(255, 255, 255))
-                    y_offset += bbox[3] - bbox[1] + 10
 
-        frame = cv2.cvtColor(np.array(frame_pil), cv2.COLOR_RGB2BGR)
-        out.write(frame)
+### **🔹 Function: Overlay Subtitles on Video**
+def overlay_subtitles(video_path, srt_path, output_filename="final_video_with_subtitles.mp4", output_dir=RESULTS_DIR,
+                      workers=BURN_IN_WORKERS, smart_render=BURN_IN_SMART_RENDER):
+    """
+    Burn subtitles into a video with a single H.264 encode and the original audio muxed in.
 
-    video.release()
-    out.release()
+    Videos longer than BURN_IN_MIN_CHUNK_SECONDS per worker are split into keyframe-aligned
+    ranges that are rendered on `workers` processes and concatenated losslessly.
 
-    # 🔹 Add original audio back to the video
-    final_output = os.path.join(RESULTS_DIR, "final_video_with_subtitles.mp4")
-    video_clip = VideoFileClip(output_path)
-    original_audio = VideoFileClip(video_path).audio
-    final_video = video_clip.with_audio(original_audio)
-    final_video.write_videofile(final_output, codec="libx264", audio_codec="aac")
+    With `smart_render`, GOPs that carry no subtitle are stream-copied and only the GOPs
+    overlapping a cue are re-encoded with the source's H.264 settings, cutting at closed-GOP
+    keyframes only. Sources those settings cannot be matched for (see `can_smart_render`), and
+    spliced outputs that do not decode cleanly, fall back to a full render.
+    """
+    info = probe_video(video_path)
+    final_output = os.path.join(output_dir, output_filename)
+    keyframes = None
+
+    if smart_render and can_smart_render(info):
+        keyframes = probe_keyframes(video_path, closed_gop_only=True)
+        cues = SubtitleTrack(pysrt.open(srt_path)).cues
+        max_render_seconds = max(BURN_IN_MIN_CHUNK_SECONDS, info["duration"] / max(workers, 1))
+        segments = plan_smart_segments(keyframes, info["duration"], cues, max_render_seconds)
+        if any(kind == "copy" for _, _, kind in segments):
+            rendered = sum(end - start for start, end, kind in segments if kind == "render")
+            print(f"⚡ Smart render: re-encoding {rendered:.0f}s of {info['duration']:.0f}s")
+            try:
+                render_segments_parallel(video_path, srt_path, final_output, info, segments, workers, output_dir,
+                                         encoder_options=matching_encoder_options(info))
+                if decodes_cleanly(final_output):
+                    print(f"✅ Final video with subtitles saved at: {final_output}")
+                    return final_output
+                print("⚠️ Smart-rendered video does not decode cleanly, falling back to a full render")
+            except RuntimeError as e:
+                print(f"⚠️ Smart render failed ({e}), falling back to a full render")
+
+    chunk_count = min(workers, int(info["duration"] // BURN_IN_MIN_CHUNK_SECONDS))
+    if chunk_count > 1:
+        keyframes = keyframes if keyframes is not None else probe_keyframes(video_path)
+        ranges = plan_chunks(keyframes, info["duration"], chunk_count)
+    else:
+        ranges = []
+
+    if len(ranges) > 1:
+        print(f"⚙️ Rendering {len(ranges)} chunks on {workers} workers...")
+        segments = [(start, end, "render") for start, end in ranges]
+        render_segments_parallel(video_path, srt_path, final_output, info, segments, workers, output_dir)
+    else:
+        render_range(video_path, srt_path, final_output, info, audio_source=video_path)
 
     print(f"✅ Final video with subtitles saved at: {final_output}")
     return final_output
 
 
-### **🔹 Main Function: Process Video & Generate Subtitles**
-def generate_subtitles(gdrive_url, target_language="fr"):
+def can_smart_render(info):
     """
-    Process video: Download, extract audio, transcribe, translate, generate subtitles, and overlay on video.
+    Copied GOPs can only be spliced with our libx264 segments if libx264 can reproduce the source:
+    an H.264 profile it encodes, progressive yuv420p at a constant frame rate and even dimensions.
+    Rotated sources are excluded: decoded frames are auto-rotated, copied ones are not.
     """
-    print("📥 Downloading video...")
-    video_path = download_video(gdrive_url)
+    return (info["video_codec"] == "h264" and info["profile"] in X264_PROFILES and info["pix_fmt"] == "yuv420p"
+            and info["width"] % 2 == 0 and info["height"] % 2 == 0 and info["rotation"] == 0
+            and info["field_order"] in (None, "progressive", "unknown") and info["constant_frame_rate"])
 
-    print("🎵 Extracting audio...")
-    audio_path = extract_audio(video_path)
 
-    print("📝 Transcribing audio...")
-    transcription = transcribe_audio(audio_path)
+### **🔹 Main Function: Process Video & Generate Subtitles**
+def generate_subtitles(gdrive_url, target_language="fr", workspace=None, progress=no_progress, mode="burn",
+                       smart_render=BURN_IN_SMART_RENDER, engine=None, tier=None):
+    """
+    Process video: Download, extract audio, transcribe, translate, generate subtitles, and add them to the video.
+    All intermediate and output files are written inside `workspace`.
 
-    print(f"🌍 Translating subtitles to {target_language}...")
-    translated_transcription = translate_transcription(transcription, target_language)
+    `target_language` is a language code or a list of codes. The video is transcribed once
+    and translated to every target concurrently, so each extra language only costs its translation
+    (plus its render in burn mode). Targets matching the spoken language are not translated.
 
-    print("📜 Generating subtitle file...")
-    srt_path = generate_srt(translated_transcription)
+    Modes:
+        burn: render each language's subtitles into its own copy of the video.
+        soft: mux each language as a selectable `mov_text` track, stream-copying video and audio.
+        vtt:  leave the video untouched and write WebVTT sidecar files.
 
-    print("🎬 Overlaying subtitles onto video...")
-    final_video_path = overlay_subtitles(video_path, srt_path)
+    `smart_render` (burn mode) re-encodes only the parts of the video that show a subtitle.
+    `engine` and `tier` select the transcription engine and quality tier (draft, standard, accurate).
 
-    return final_video_path
+    Returns:
+        dict: final_video and subtitle_file for the first language, plus subtitle_files
+        (and final_videos or vtt_files) per language.
+    """
+    workspace = workspace or create_workspace()
+    target_languages = [target_language] if isinstance(target_language, str) else list(target_language)
+    single = len(target_languages) == 1
+
+    print("📥 Downloading video, 🎵 extracting audio, 📝 transcribing...")
+    video_path, transcription = transcribe_video(gdrive_url, workspace, progress, engine, tier)
+    if not transcription:
+        raise RuntimeError("Transcription failed")
+
+    def subtitles_for(language):
+        if same_language(transcription.get("language"), language):
+            print(f"⏭️ Audio is already in {language}, skipping translation")
+            translated_transcription = transcription
+        else:
+            print(f"🌍 Translating subtitles to {language}...")
+            translated_transcription = translate_transcription(copy.deepcopy(transcription), language)
+
+        print(f"📜 Generating subtitle file ({language})...")
+        srt_filename = "subtitles.srt" if single else f"subtitles_{language}.srt"
+        return generate_srt(translated_transcription, srt_filename, output_dir=workspace)
+
+    progress("translating", 0.5)
+    srt_paths = fan_out_languages(target_languages, subtitles_for)
+
+    result = {"subtitle_file": srt_paths[target_languages[0]], "subtitle_files": srt_paths}
+
+    if mode == "soft":
+        print("📦 Muxing subtitle tracks into video...")
+        progress("muxing", 0.8)
+        result["final_video"] = mux_soft_subtitles(video_path, srt_paths, output_dir=workspace)
+    elif mode == "vtt":
+        result["final_video"] = video_path
+        result["vtt_files"] = {language: srt_to_vtt(path) for language, path in srt_paths.items()}
+    else:
+        final_videos = {}
+        for i, language in enumerate(target_languages):
+            print(f"🎬 Overlaying subtitles onto video ({language})...")
+            progress(f"rendering_{language}", 0.6 + 0.4 * i / len(target_languages))
+            output_filename = "final_video_with_subtitles.mp4" if single else f"final_video_with_subtitles_{language}.mp4"
+            final_videos[language] = overlay_subtitles(video_path, srt_paths[language], output_filename,
+                                                       output_dir=workspace, smart_render=smart_render)
+        result["final_video"] = final_videos[target_languages[0]]
+        result["final_videos"] = final_videos
+
+    return result
 
 
 ### **🔹 Run the Script for Testing**
 if __name__ == "__main__":
     test_gdrive_url = "https://drive.google.com/file/d/1x2HlTWOH2_rJJWeEU7xl5na-mtfCqKV2/view?usp=drive_link"
-    final_video = generate_subtitles(test_gdrive_url, "fr")
-    print(f"✅ Final processed video: {final_video}")
+    result = generate_subtitles(test_gdrive_url, "fr")
+    print(f"✅ Final processed video: {result['final_video']}")
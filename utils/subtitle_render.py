@@ -0,0 +1,283 @@
+import os
+import sys
+import multiprocessing
+import numpy as np
+import pysrt
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# 🔹 Kept free of Whisper/translation imports so burn-in workers stay light. Spawned workers also
+#    re-import the parent's `__main__`: under `python utils/backend_app.py` that is the whole pipeline
+#    (translation memory included); `waitress-serve utils.backend_app:app` keeps them to this module.
+from utils.media import read_frames, FrameWriter, concat_segments, copy_segment
+
+SUBTITLE_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+SUBTITLE_FONT_SIZE = 40
+
+
+### **🔹 Subtitle Index: Resolve Active Cues with the Frame Clock**
+class SubtitleTrack:
+    """
+    Subtitle cues sorted by start time.
+
+    `active_at()` advances a cursor as the frame clock moves forward, so each frame only
+    looks at cues that just started or are still on screen instead of scanning every cue.
+    """
+
+    def __init__(self, subs):
+        self.cues = sorted(
+            (sub.start.ordinal / 1000.0, sub.end.ordinal / 1000.0, sub.text) for sub in subs
+        )
+        self.reset()
+
+    def reset(self):
+        self._next = 0
+        self._active = []
+        self._time = float("-inf")
+
+    def active_at(self, current_time):
+        """
+        Return the indexes of cues visible at `current_time` (start <= t <= end).
+        """
+        if current_time < self._time:
+            self.reset()  # Clock went backwards (seek); rebuild from the start
+        self._time = current_time
+
+        while self._next < len(self.cues) and self.cues[self._next][0] <= current_time:
+            self._active.append(self._next)
+            self._next += 1
+
+        self._active = [i for i in self._active if self.cues[i][1] >= current_time]
+        return self._active
+
+
+### **🔹 Function: Render a Subtitle Once as an RGBA Sprite**
+def wrap_subtitle_text(text, font, max_width):
+    """
+    Greedy word wrap of `text` so that no line is wider than `max_width` pixels.
+    """
+    lines = []
+    current_line = ""
+
+    for word in text.split():
+        test_line = current_line + " " + word if current_line else word
+        bbox = font.getbbox(test_line)
+        if bbox[2] - bbox[0] > max_width and current_line:
+            lines.append(current_line)
+            current_line = word
+        else:
+            current_line = test_line
+
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def render_subtitle_sprite(text, font, max_width, line_spacing=10):
+    """
+    Lay out and draw a subtitle's wrapped text into a transparent RGBA image.
+    """
+    lines = wrap_subtitle_text(text, font, max_width)
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent + line_spacing
+    width = max((int(font.getbbox(line)[2]) for line in lines), default=0)
+    height = line_height * len(lines)
+
+    sprite = Image.new("RGBA", (max(width, 1), max(height, 1)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sprite)
+    for i, line in enumerate(lines):
+        draw.text((0, i * line_height), line, font=font, fill=(255, 255, 255, 255))
+    return sprite
+
+
+### **🔹 Function: Alpha-Blend a Sprite into a BGR Frame In Place**
+class SubtitleBitmap:
+    """
+    A sprite converted once into the arrays needed to blend it into BGR frames:
+    the alpha-premultiplied BGR colour and the inverse alpha, both as uint16.
+    """
+
+    def __init__(self, sprite):
+        rgba = np.asarray(sprite, dtype=np.uint16)
+        alpha = rgba[:, :, 3:4]
+        self.premultiplied = rgba[:, :, 2::-1] * alpha  # RGB → BGR, times alpha
+        self.inverse_alpha = 255 - alpha
+        self.height, self.width = rgba.shape[:2]
+
+
+def blend_bitmap(frame, bitmap, x, y):
+    """
+    Blend `bitmap` into `frame` (H×W×3 BGR uint8) at (x, y), touching only the covered region.
+    """
+    frame_height, frame_width = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + bitmap.width, frame_width), min(y + bitmap.height, frame_height)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    sx, sy = x0 - x, y0 - y
+    premultiplied = bitmap.premultiplied[sy:sy + y1 - y0, sx:sx + x1 - x0]
+    inverse_alpha = bitmap.inverse_alpha[sy:sy + y1 - y0, sx:sx + x1 - x0]
+
+    roi = frame[y0:y1, x0:x1]
+    blended = roi * inverse_alpha  # uint8 × uint16 → uint16
+    blended += premultiplied
+    blended += 127
+    blended //= 255
+    roi[...] = blended
+    return frame
+
+
+class SubtitleSpriteCache:
+    """
+    Pre-rendered bitmaps keyed by cue index; bitmaps of cues that left the screen are dropped.
+    """
+
+    def __init__(self, track, font, max_width):
+        self.track = track
+        self.font = font
+        self.max_width = max_width
+        self._sprites = {}
+
+    def get(self, index):
+        sprite = self._sprites.get(index)
+        if sprite is None:
+            sprite = SubtitleBitmap(render_subtitle_sprite(self.track.cues[index][2], self.font, self.max_width))
+            self._sprites[index] = sprite
+        return sprite
+
+    def retain(self, active):
+        for index in list(self._sprites):
+            if index not in active:
+                del self._sprites[index]
+
+
+### **🔹 Function: Render One Time Range with Subtitles**
+def render_range(video_path, srt_path, output_path, info, start=0.0, duration=None,
+                 audio_source=None, threads=None, encoder_options=None):
+    """
+    Decode [start, start + duration), blend the visible subtitles into each frame and encode it.
+    Frames are streamed one at a time, so memory stays bounded regardless of video length.
+    `encoder_options` are passed on to the encoder (see `matching_encoder_options`).
+    """
+    frame_width, frame_height, fps = info["width"], info["height"], info["fps"]
+
+    track = SubtitleTrack(pysrt.open(srt_path))
+    font = ImageFont.truetype(SUBTITLE_FONT_PATH, SUBTITLE_FONT_SIZE)
+    sprites = SubtitleSpriteCache(track, font, max_width=frame_width - 100)
+
+    frames = read_frames(video_path, frame_width, frame_height, start=start, duration=duration)
+    try:
+        with FrameWriter(output_path, frame_width, frame_height, info["frame_rate"],
+                         audio_source=audio_source, audio_codec=info["audio_codec"], threads=threads,
+                         encoder_options=encoder_options,
+                         sample_aspect_ratio=info.get("sample_aspect_ratio")) as writer:
+            for frame_index, frame in enumerate(frames):
+                active = track.active_at(start + frame_index / fps)
+                sprites.retain(active)
+
+                # 🔹 Frames without a visible cue are written untouched
+                for index in active:
+                    bitmap = sprites.get(index)
+                    blend_bitmap(frame, bitmap, 50, frame_height - bitmap.height - 50)
+
+                writer.write(frame)
+    finally:
+        frames.close()
+    return output_path
+
+
+def _render_segment_job(args):
+    """
+    Process-pool entry point: ("render", render_range args...) or ("copy", copy_segment args...).
+    """
+    kind, params = args
+    if kind == "copy":
+        return copy_segment(*params)
+    return render_range(*params)
+
+
+### **🔹 Function: Split a Video into Keyframe-Aligned Ranges**
+def plan_chunks(keyframes, duration, chunk_count):
+    """
+    Pick up to `chunk_count` (start, end) ranges of roughly equal length whose
+    boundaries fall on keyframes, so every range can be decoded independently.
+    """
+    if chunk_count <= 1 or duration <= 0 or len(keyframes) < 2:
+        return [(0.0, duration)]
+
+    boundaries = [0.0]
+    for i in range(1, chunk_count):
+        target = duration * i / chunk_count
+        nearest = min(keyframes, key=lambda k: abs(k - target))
+        if boundaries[-1] < nearest < duration:
+            boundaries.append(nearest)
+    boundaries.append(duration)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+### **🔹 Function: Smart Render Plan (Re-encode Only GOPs with Subtitles)**
+def plan_smart_segments(keyframes, duration, cues, max_render_seconds):
+    """
+    Split the video into GOPs (keyframe to keyframe) and mark each one "render" if any
+    cue overlaps it, or "copy" if nothing is on screen. Neighbouring GOPs of the same kind
+    are merged; render runs are capped at `max_render_seconds` so they spread across workers.
+    Returns a list of (start, end, kind).
+    """
+    starts = [k for k in keyframes if 0.0 < k < duration]
+    boundaries = [0.0] + starts + [duration]
+
+    segments = []
+    cue_index = 0
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        # Cues are sorted by start; skip those that ended before this GOP
+        while cue_index < len(cues) and cues[cue_index][1] < start:
+            cue_index += 1
+        dirty = False
+        j = cue_index
+        while j < len(cues) and cues[j][0] < end:
+            if cues[j][1] >= start:
+                dirty = True
+                break
+            j += 1
+        kind = "render" if dirty else "copy"
+
+        if segments and segments[-1][2] == kind and (kind == "copy" or end - segments[-1][0] <= max_render_seconds):
+            segments[-1] = (segments[-1][0], end, kind)
+        else:
+            segments.append((start, end, kind))
+    return segments
+
+
+### **🔹 Function: Render Segments in Parallel and Concatenate**
+def render_segments_parallel(video_path, srt_path, output_path, info, segments, workers, work_dir,
+                             encoder_options=None):
+    """
+    Produce each (start, end, kind) segment as its own MPEG-TS file in a process pool —
+    "render" segments get subtitles burned in, "copy" segments are stream-copied —
+    then join them with the original audio without re-encoding.
+    Splicing "copy" segments needs `encoder_options` that match the source stream.
+    """
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    segment_paths = [os.path.join(work_dir, f"segment_{i:04d}.ts") for i in range(len(segments))]
+    jobs = []
+    for segment_path, (start, end, kind) in zip(segment_paths, segments):
+        if kind == "copy":
+            jobs.append(("copy", (video_path, segment_path, start, end - start)))
+        else:
+            jobs.append(("render", (video_path, srt_path, segment_path, info, start, end - start, None, threads,
+                                    encoder_options)))
+
+    try:
+        # Spawned, not forked: forking the multi-threaded server process can deadlock the child
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(_render_segment_job, jobs))
+        return concat_segments(segment_paths, output_path, audio_source=video_path, audio_codec=info["audio_codec"],
+                               timescale=info.get("timescale"))
+    finally:
+        for segment_path in segment_paths:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
@@ -1,38 +1,318 @@
 import os
+import re
 import datetime
+import threading
+import importlib.util
 from dotenv import load_dotenv
-from transformers import T5Tokenizer, T5ForConditionalGeneration
 import sys
 
 # 🔹 Ensure Python can find `utils/`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.config import RESULTS_DIR  # ✅ Import shared directory
+from utils.config import (  # ✅ Import shared directory
+    RESULTS_DIR, SUMMARY_WINDOW_TOKENS, SUMMARY_BATCH_SIZE, SUMMARY_BATCH_WAIT_MS,
+    SUMMARY_MODEL_NAME, SUMMARY_ENGINE, SUMMARY_ONNX_DIR, SUMMARY_CACHE_DIR, SUMMARY_CACHE_MEMORY_ENTRIES
+)
+from utils.micro_batcher import MicroBatcher
+from utils.model_registry import ModelRegistry
+from utils.summary_cache import SummaryCache
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the tokenizer and model
-tokenizer = T5Tokenizer.from_pretrained("t5-base")
-model = T5ForConditionalGeneration.from_pretrained("t5-base")
+# 🔹 Inference engines for CPU nodes
+SUMMARY_ENGINES = ("pytorch", "int8", "onnx")
+# Optional packages an engine needs beyond torch/transformers: (module, pip package)
+SUMMARY_ENGINE_REQUIREMENTS = {"onnx": ("optimum.onnxruntime", "optimum[onnxruntime]")}
+
+def missing_summary_package(engine=SUMMARY_ENGINE):
+    """
+    Return the pip package to install when `engine`'s optional dependency is missing, else None.
+    """
+    if engine not in SUMMARY_ENGINE_REQUIREMENTS:
+        return None
+    module, package = SUMMARY_ENGINE_REQUIREMENTS[engine]
+    try:
+        found = importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # Parent package (optimum) missing
+        found = False
+    return None if found else package
+
+def load_summary_model(engine=SUMMARY_ENGINE, model_name=SUMMARY_MODEL_NAME):
+    """
+    Load the summarization model for the selected inference engine:
+        pytorch: full-precision PyTorch (reference).
+        int8:    PyTorch with dynamic int8 quantization of the Linear layers.
+        onnx:    ONNX Runtime encoder/decoder sessions, exported once and cached on disk.
+    """
+    import torch
+    from transformers import T5ForConditionalGeneration
+
+    if engine not in SUMMARY_ENGINES:
+        raise ValueError(f"Unknown summary engine: {engine}. Available: {', '.join(SUMMARY_ENGINES)}")
+
+    if engine == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise RuntimeError("The onnx summary engine needs `pip install optimum[onnxruntime]`") from e
+
+        export_dir = os.path.join(SUMMARY_ONNX_DIR, model_name.replace("/", "_"))
+        if os.path.isdir(export_dir):
+            return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+
+        print(f"📦 Exporting {model_name} to ONNX: {export_dir}")
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+        ort_model.save_pretrained(export_dir)
+        return ort_model
+
+    torch_model = T5ForConditionalGeneration.from_pretrained(model_name).eval()
+    if engine == "int8":
+        torch_model = torch.quantization.quantize_dynamic(torch_model, {torch.nn.Linear}, dtype=torch.qint8)
+    return torch_model
+
+def _load_tokenizer(model_name):
+    from transformers import T5Tokenizer
+    return T5Tokenizer.from_pretrained(model_name)
+
+# 🔹 The tokenizer and model are loaded on first use (or by the backend's warm-up), not at import
+tokenizers = ModelRegistry(_load_tokenizer, size_of=lambda tokenizer: 0)
+summary_models = ModelRegistry(load_summary_model)
+
+def get_tokenizer():
+    return tokenizers.get(SUMMARY_MODEL_NAME)
+
+def get_model():
+    return summary_models.get(SUMMARY_ENGINE)
+
+def load_models():
+    """
+    Load the tokenizer and the configured summary model (used to warm up the server).
+    """
+    get_tokenizer()
+    get_model()
+
+# 🔹 Generation settings shared by every summarization stage
+SUMMARY_PREFIX = "summarize: "
+GENERATION_KWARGS = {"max_length": 150, "min_length": 40, "length_penalty": 2.0, "num_beams": 4, "early_stopping": True}
+MAX_REDUCE_ROUNDS = 5
+REDUCE_MIN_LENGTH = 20
+# Token streaming needs greedy decoding (streamers cannot follow several beams)
+STREAM_GENERATION_KWARGS = {"max_length": 150, "min_length": 40, "num_beams": 1}
+
+# 🔹 Repeat requests for the same transcript return the cached summary and artifact
+summary_cache = SummaryCache(SUMMARY_CACHE_DIR, max_memory_entries=SUMMARY_CACHE_MEMORY_ENTRIES)
+
+def summary_settings(generation_kwargs=GENERATION_KWARGS):
+    """
+    Everything besides the transcript that changes the generated summary (part of the cache key).
+    """
+    return {
+        "engine": SUMMARY_ENGINE,
+        "prefix": SUMMARY_PREFIX,
+        "generation": generation_kwargs,
+        "window_tokens": SUMMARY_WINDOW_TOKENS,
+        "reduce_min_length": REDUCE_MIN_LENGTH,
+        "max_reduce_rounds": MAX_REDUCE_ROUNDS
+    }
+
+def split_into_windows(text, max_tokens=SUMMARY_WINDOW_TOKENS):
+    """
+    Split a transcript into consecutive windows that each fit in the model's input,
+    breaking on line (segment) and sentence boundaries, and on words only as a last resort.
+    """
+    tokenizer = get_tokenizer()
+
+    # Room left for the text once the task prefix and end-of-sequence token are added
+    budget = max_tokens - len(tokenizer.encode(SUMMARY_PREFIX, add_special_tokens=False)) - 1
+
+    def token_count(piece):
+        return len(tokenizer.encode(piece, add_special_tokens=False))
+
+    units = []
+    for line in text.splitlines():
+        for sentence in re.split(r"(?<=[.!?])\s+", line.strip()):
+            if not sentence:
+                continue
+            if token_count(sentence) <= budget:
+                units.append((sentence, token_count(sentence)))
+                continue
+            # A single over-long "sentence" (unpunctuated speech) is cut into word groups
+            for word in sentence.split():
+                units.append((word, token_count(word)))
+
+    windows, current, current_tokens = [], [], 0
+    for unit, tokens in units:
+        if current and current_tokens + tokens > budget:
+            windows.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+def _generate_batch(texts, overrides):
+    """
+    Run one padded, batched `model.generate` over `texts` (called by the batcher thread).
+    """
+    import torch
+
+    tokenizer, model = get_tokenizer(), get_model()
+    kwargs = {**GENERATION_KWARGS, **dict(overrides or ())}
+    batch = [SUMMARY_PREFIX + text for text in texts]
+    inputs = tokenizer(batch, return_tensors="pt", max_length=SUMMARY_WINDOW_TOKENS,
+                       truncation=True, padding=True)
+    with torch.inference_mode():
+        summary_ids = model.generate(**inputs, **kwargs)
+    return tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+# 🔹 All summarization goes through one worker thread that merges concurrent requests
+#    (and the windows of long transcripts) into shared batches
+summary_batcher = MicroBatcher(_generate_batch, max_batch_size=SUMMARY_BATCH_SIZE,
+                               max_wait_ms=SUMMARY_BATCH_WAIT_MS, name="summary-batcher")
+
+def summarize_batch(texts, **overrides):
+    """
+    Summarize several texts. Requests from all server threads are queued and grouped into
+    padded batches of up to SUMMARY_BATCH_SIZE windows, so concurrent callers share
+    `model.generate` calls instead of contending for the CPU with separate ones.
+    """
+    return summary_batcher.map(texts, key=tuple(sorted(overrides.items())))
+
+def summarize_long_text(text):
+    """
+    Map-reduce summarization: summarize every window (map), then summarize the
+    concatenated partial summaries (reduce), recursing until they fit in one window.
+    """
+    windows = split_into_windows(text)
+    for round_number in range(MAX_REDUCE_ROUNDS):
+        if len(windows) <= 1:
+            break
+        print(f"🧩 Summarizing {len(windows)} windows (round {round_number + 1})...")
+        # Shorter partial summaries so that several fit in the next round's window
+        partial = summarize_batch(windows, min_length=REDUCE_MIN_LENGTH)
+        windows = split_into_windows("\n".join(partial))
+
+    # Anything still over one window after the last round is truncated by the tokenizer
+    return summarize_batch(["\n".join(windows)])[0]
 
 def summarize_text(video_transcript, save=True):
     """
     Generate a summary from a video transcript.
-    If `save=True`, the summary is saved to a file.
-    Returns the summary text and the file path if saved.
+    Transcripts longer than one model window are summarized hierarchically instead of truncated.
+    Summaries are cached by transcript, model and generation settings; a repeat request
+    returns the cached summary and reuses its file instead of generating again.
+    Returns the summary text and the file path if `save=True`.
+    """
+    key = SummaryCache.make_key(video_transcript, SUMMARY_MODEL_NAME, summary_settings())
+    cached = summary_cache.get(key)
+    if cached is not None:
+        print("⚡ Summary cache hit")
+        summary, file_path = cached
+    else:
+        summary = summarize_long_text(video_transcript)
+        file_path = summary_cache.put(key, summary)
+
+    return summary, file_path if save else None
+
+def _stream_generate(text, generation_kwargs=STREAM_GENERATION_KWARGS):
+    """
+    Yield decoded text pieces for `text` as the model produces them (greedy decoding).
     """
-    # Prepend the task prefix for T5
-    input_text = "summarize: " + video_transcript
-    inputs = tokenizer.encode(input_text, return_tensors="pt", max_length=512, truncation=True)
-    summary_ids = model.generate(inputs, max_length=150, min_length=40, length_penalty=2.0, num_beams=4, early_stopping=True)
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+    import torch
+    from transformers import TextIteratorStreamer
 
-    file_path = None  # Default: No file saved
-    if save:
-        file_path = save_summary(summary)
+    tokenizer, model = get_tokenizer(), get_model()
+    inputs = tokenizer(SUMMARY_PREFIX + text, return_tensors="pt", max_length=SUMMARY_WINDOW_TOKENS, truncation=True)
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
 
-    return summary, file_path
+    def generate():
+        try:
+            with torch.inference_mode():
+                model.generate(**inputs, **generation_kwargs, streamer=streamer)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    worker = threading.Thread(target=generate, name="summary-stream", daemon=True)
+    worker.start()
+    for piece in streamer:
+        if piece:
+            yield piece
+    worker.join()
+    if errors:
+        raise errors[0]
+
+def stream_summary(video_transcript):
+    """
+    Summarize a transcript, yielding progress events as they are produced:
+        {"type": "partial", "round", "index", "total", "text"}  one per window of a long transcript (map stage)
+        {"type": "token", "text"}                                 pieces of the final summary
+        {"type": "summary", "summary", "file_path", "cached"}     the finished summary and its artifact
+    The final pass is decoded greedily so tokens can be streamed; its result is cached
+    separately from the beam-search summaries returned by `summarize_text`.
+    """
+    key = SummaryCache.make_key(video_transcript, SUMMARY_MODEL_NAME, summary_settings(STREAM_GENERATION_KWARGS))
+    cached = summary_cache.get(key)
+    if cached is not None:
+        summary, file_path = cached
+        yield {"type": "summary", "summary": summary, "file_path": file_path, "cached": True}
+        return
+
+    windows = split_into_windows(video_transcript)
+    for round_number in range(MAX_REDUCE_ROUNDS):
+        if len(windows) <= 1:
+            break
+        futures = [summary_batcher.submit(window, key=(("min_length", REDUCE_MIN_LENGTH),)) for window in windows]
+        partial = []
+        for index, future in enumerate(futures):
+            partial.append(future.result())
+            yield {"type": "partial", "round": round_number + 1, "index": index,
+                   "total": len(futures), "text": partial[-1]}
+        windows = split_into_windows("\n".join(partial))
+
+    pieces = []
+    for piece in _stream_generate("\n".join(windows)):
+        pieces.append(piece)
+        yield {"type": "token", "text": piece}
+
+    summary = "".join(pieces).strip()
+    file_path = summary_cache.put(key, summary)
+    yield {"type": "summary", "summary": summary, "file_path": file_path, "cached": False}
+
+def check_engine_parity(texts, engine=SUMMARY_ENGINE):
+    """
+    Compare `engine` against the full-precision PyTorch model on `texts`.
+    Returns per-text results and the share of identical summaries.
+    """
+    import torch
+
+    tokenizer = get_tokenizer()
+    reference = load_summary_model("pytorch")
+    candidate = summary_models.get(engine)
+
+    results = []
+    for text in texts:
+        inputs = tokenizer(SUMMARY_PREFIX + text, return_tensors="pt", max_length=SUMMARY_WINDOW_TOKENS, truncation=True)
+        outputs = {}
+        for name, engine_model in (("reference", reference), ("candidate", candidate)):
+            start = datetime.datetime.now()
+            with torch.inference_mode():
+                summary_ids = engine_model.generate(**inputs, **GENERATION_KWARGS)
+            outputs[name] = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+            outputs[f"{name}_seconds"] = (datetime.datetime.now() - start).total_seconds()
+
+        reference_words, candidate_words = outputs["reference"].split(), outputs["candidate"].split()
+        overlap = sum(1 for a, b in zip(reference_words, candidate_words) if a == b)
+        outputs["word_agreement"] = round(overlap / max(len(reference_words), len(candidate_words), 1), 3)
+        outputs["identical"] = outputs["reference"] == outputs["candidate"]
+        results.append(outputs)
+
+    identical = sum(r["identical"] for r in results) / len(results) if results else 0.0
+    return {"engine": engine, "identical_rate": identical, "results": results}
 
 def save_summary(summary_text, filename=None):
     if filename is None:
@@ -54,3 +334,14 @@ def save_summary(summary_text, filename=None):
         print(f"❌ Error saving summary: {e}")
         return None
 
+
+
+# 🔹 Parity check: python utils/summarization.py <transcript.txt> [engine]
+if __name__ == "__main__":
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        sample_windows = split_into_windows(f.read())[:5]
+    report = check_engine_parity(sample_windows, *(sys.argv[2:3] or [SUMMARY_ENGINE]))
+    for r in report["results"]:
+        print(f"⏱️ fp32 {r['reference_seconds']:.2f}s vs {report['engine']} {r['candidate_seconds']:.2f}s, "
+              f"word agreement {r['word_agreement']:.0%}")
+    print(f"✅ Identical summaries: {report['identical_rate']:.0%}")
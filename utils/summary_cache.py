@@ -0,0 +1,82 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class SummaryCache:
+    """
+    Summaries keyed by a hash of the transcript text, model and generation settings.
+
+    Each summary is stored once as `summary_<key>.txt` in `cache_dir`; that file is also
+    the artifact returned to clients, so repeated requests reuse the same path instead
+    of writing a new file. An in-memory LRU avoids re-reading recent summaries.
+    """
+
+    def __init__(self, cache_dir, max_memory_entries=64):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, model_name, settings=None):
+        """
+        Build a cache key from the transcript text, model name and generation settings.
+        """
+        payload = json.dumps({
+            "transcript": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "model": model_name,
+            "settings": settings or {}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"summary_{key[:32]}.txt")
+
+    def get(self, key):
+        """
+        Return (summary, artifact path) for `key`, or None on a miss.
+        """
+        path = self.path(key)
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None and os.path.exists(path):
+                self._memory.move_to_end(key)
+                return summary, path
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                summary = f.read()
+        except OSError:
+            return None
+
+        self._remember(key, summary)
+        return summary, path
+
+    def put(self, key, summary):
+        """
+        Store `summary` under `key` and return its artifact path (None if it could not be written).
+        """
+        self._remember(key, summary)
+
+        path = self.path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(summary)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"❌ Error saving summary: {e}")
+            return None
+        print(f"✅ Summary saved: {path}")
+        return path
+
+    def _remember(self, key, summary):
+        with self._lock:
+            self._memory[key] = summary
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
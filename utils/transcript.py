@@ -1,7 +1,6 @@
 import os
+import re
 import gdown
-import whisper
-from moviepy import *
 
 import sys
 import os
@@ -9,11 +8,43 @@ import os
 # 🔹 Ensure Python can find `utils/`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.config import RESULTS_DIR  # ✅ Import shared directory
+from utils.config import (
+    WHISPER_PRELOAD_MODELS,
+    TRANSCRIPTION_CACHE_DIR, TRANSCRIPTION_CACHE_MEMORY_ENTRIES, TRANSCRIPTION_CACHE_MAX_MB,
+    TRANSCRIPTION_WORKERS, TRANSCRIPTION_PARALLEL_MIN_SECONDS, TRANSCRIPT_STREAM_WINDOW_SECONDS,
+    TRANSCRIPTION_TIERS, TRANSCRIPTION_TIER, WARMUP_LANGUAGE
+)
+from utils.transcription_engines import get_transcription_engine, tier_model_size
+from utils.transcription_cache import TranscriptionCache, hash_audio
+from utils.jobs import create_workspace, no_progress
+from utils.media import decode_audio, SAMPLE_RATE
+from utils.chunked_transcription import transcribe_chunked, plan_audio_chunks, stitch_results
 
 # Ensure FFmpeg path is included
 os.environ["PATH"] += os.pathsep + "C:/ffmpeg/bin"
 
+def preload_whisper_models(model_sizes=WHISPER_PRELOAD_MODELS):
+    """
+    Load the default engine's Whisper models ahead of the first request (called at server start).
+    Each engine keeps its models loaded once per process, shared across requests.
+    Without `model_sizes`, loads what the default tier needs: its multilingual model, which detects
+    the language, and the model it transcribes WARMUP_LANGUAGE audio with (e.g. `base.en`).
+    Raises if a model fails to load, so the warm-up does not report it as ready.
+    """
+    if not model_sizes:
+        detection_model = TRANSCRIPTION_TIERS[TRANSCRIPTION_TIER]["model_size"].removesuffix(".en")
+        model_sizes = list(dict.fromkeys([detection_model, tier_model_size(language=WARMUP_LANGUAGE)]))
+    models = get_transcription_engine().models
+    for model_size in model_sizes:
+        models.get(model_size)
+
+# 🔹 Whisper results are shared by every endpoint through a content-addressed cache
+transcription_cache = TranscriptionCache(
+    TRANSCRIPTION_CACHE_DIR,
+    max_memory_entries=TRANSCRIPTION_CACHE_MEMORY_ENTRIES,
+    max_disk_mb=TRANSCRIPTION_CACHE_MAX_MB
+)
+
 def seconds_to_hms(seconds):
     """
     Converts seconds into hours, minutes, and seconds (hh:mm:ss).
@@ -41,71 +72,168 @@ def download_video(drive_link, output_path="video.mp4"):
         print(f"❌ Error downloading video: {e}")
         return None
 
-def extract_audio(video_path, audio_path="audio.wav"):
+def extract_audio(video_path, spill_path=None):
     """
-    Extract audio from a video file.
+    Extract audio from a video file as 16 kHz mono float32 samples, ready for Whisper.
+    Long recordings are spilled to `spill_path` and memory-mapped instead of held in RAM.
     """
     try:
-        video = VideoFileClip(video_path)
-        video.audio.write_audiofile(audio_path)
-        print(f"✅ Audio extracted successfully: {audio_path}")
-        return audio_path
+        audio = decode_audio(video_path, spill_path)
+        print(f"✅ Audio extracted successfully: {len(audio) / SAMPLE_RATE:.1f}s")
+        return audio
     except Exception as e:
         print(f"❌ Error extracting audio: {e}")
         return None
 
-def transcribe_audio(audio_path, model_size="base"):
+def detect_language(audio, model_size="base", engine=None, audio_hash=None):
+    """
+    Detect the spoken language from the first 30 seconds of `audio` (None on failure).
+    Results are cached by audio content, so a repeat request does no Whisper work.
+    """
+    try:
+        engine = get_transcription_engine(engine)
+        # English-only checkpoints cannot detect languages; use their multilingual counterpart
+        model_size = model_size.removesuffix(".en")
+        cache_key = TranscriptionCache.make_key(audio_hash or hash_audio(audio), f"{engine.name}/{model_size}",
+                                                {"task": "detect_language"})
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            return cached["language"]
+
+        language = engine.detect_language(audio, model_size)
+        print(f"🌐 Detected language: {language}")
+        transcription_cache.put(cache_key, {"language": language})
+        return language
+    except Exception as e:
+        print(f"❌ Error detecting language: {e}")
+        return None
+
+def transcription_settings(audio, tier=None, engine=None, audio_hash=None):
+    """
+    Map a quality tier (default: TRANSCRIPTION_TIER) to a model size and Whisper decode options.
+
+    The language is detected up front from the first 30 seconds and passed to the full
+    transcription as `language`, so Whisper skips its own detection pass. Tiers marked
+    `english_only` switch to the smaller, more accurate `.en` model for English audio.
+    """
+    settings = dict(TRANSCRIPTION_TIERS[tier or TRANSCRIPTION_TIER])
+    model_size = settings.pop("model_size")
+    settings.pop("english_only", None)
+    options = {key: value for key, value in settings.items() if value is not None}
+
+    language = detect_language(audio, model_size, engine, audio_hash)
+    if language:
+        options["language"] = language
+    return tier_model_size(tier, language), options
+
+def transcription_cache_key(audio, model_size, engine, options, audio_hash=None):
+    """
+    Cache key of a transcription. Whole-file, chunked and streamed runs of the same audio and
+    settings share it, so each video goes through Whisper once whichever endpoint sees it first.
+    """
+    return TranscriptionCache.make_key(audio_hash or hash_audio(audio), f"{engine.name}/{model_size}", options)
+
+def transcribe_audio(audio, model_size="base", engine=None, audio_hash=None, **options):
     """
     Transcribe audio to text using Whisper AI.
+    `audio` is a file path or 16 kHz mono float32 samples from `extract_audio`.
+    `engine` names the transcription engine (default: TRANSCRIPTION_ENGINE); `audio_hash` skips
+    re-hashing audio the caller has already hashed.
+    Long recordings are split on silences and transcribed in parallel worker processes.
+    Results are cached by audio content, engine, model size and decode options.
     """
     try:
-        model = whisper.load_model(model_size)
-        result = model.transcribe(audio_path)
-        return result
+        engine = get_transcription_engine(engine)
+        chunked = (not isinstance(audio, str) and TRANSCRIPTION_WORKERS > 1
+                   and len(audio) / SAMPLE_RATE >= TRANSCRIPTION_PARALLEL_MIN_SECONDS)
+        cache_key = transcription_cache_key(audio, model_size, engine, options, audio_hash)
+        result = transcription_cache.get(cache_key)
+        if result is not None:
+            print("⚡ Transcription cache hit")
+            return result
+
+        if chunked:
+            result = transcribe_chunked(audio, model_size, engine.name, **options)
+        else:
+            result = engine.transcribe(audio, model_size, **options)
+        return transcription_cache.put(cache_key, result)
     except Exception as e:
         print(f"❌ Error transcribing audio: {e}")
         return None
 
-# 🔹 Transcript Function (No Timeline, for Summarization)
-def transcript(drive_link):
+def stream_transcription(audio, model_size="base", window_seconds=TRANSCRIPT_STREAM_WINDOW_SECONDS, engine=None,
+                         audio_hash=None, **options):
     """
-    Get transcript from video URL (Plain Text).
+    Transcribe `audio` window by window, yielding each Whisper segment as soon as its window
+    is decoded. Windows are cut on silences; unless `condition_on_previous_text` is False, each
+    is prompted with the end of the previous window's text to keep context. A result already cached by `transcribe_audio` is replayed,
+    and the stitched result is stored under the same key for the other endpoints to reuse.
     """
-    video_path = download_video(drive_link)
-    if not video_path:
-        return None
+    engine = get_transcription_engine(engine)
+    cache_key = transcription_cache_key(audio, model_size, engine, options, audio_hash)
+    result = transcription_cache.get(cache_key)
+    if result is not None:
+        print("⚡ Transcription cache hit")
+        yield from result["segments"]
+        return
 
-    audio_path = extract_audio(video_path)
-    if not audio_path:
-        return None
+    carry_prompt = options.get("condition_on_previous_text", True)
+    results, offsets = [], []
+    for start, end in plan_audio_chunks(audio, window_seconds):
+        prompt = results[-1]["text"][-200:] if results and carry_prompt else options.get("initial_prompt")
+        window = engine.transcribe(audio[start:end], model_size, **{**options, "initial_prompt": prompt})
 
-    transcription_result = transcribe_audio(audio_path)
-    if transcription_result:
-        return transcription_result["text"]
-    
-    return None
+        offset = start / SAMPLE_RATE
+        results.append(window)
+        offsets.append(offset)
+        for segment in window["segments"]:
+            yield {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
 
-def transcript_with_timeline(drive_link):
+    transcription_cache.put(cache_key, stitch_results(results, offsets))
+
+# 🔹 Shared pipeline: download → extract audio → transcribe
+def transcribe_video(drive_link, workspace=None, progress=no_progress, engine=None, tier=None):
     """
-    Get transcript with timestamps from video URL and save it in a shared directory.
+    Download a video, extract its audio and transcribe it inside `workspace` with `engine`,
+    using the model and decoding settings of the quality `tier`.
+    Returns a tuple of (video_path, transcription_result); either may be None on failure.
     """
-    transcript_path = os.path.join(RESULTS_DIR, "transcription_with_timestamps.txt")
+    workspace = workspace or create_workspace()
 
-    video_path = download_video(drive_link)
+    progress("downloading", 0.0)
+    video_path = download_video(drive_link, os.path.join(workspace, "video.mp4"))
     if not video_path:
-        return None
+        return None, None
 
-    audio_path = extract_audio(video_path)
-    if not audio_path:
-        return None
+    progress("extracting_audio", 0.15)
+    audio = extract_audio(video_path, os.path.join(workspace, "audio.f32"))
+    if audio is None:
+        return video_path, None
 
-    transcription_result = transcribe_audio(audio_path)
-    if not transcription_result:
-        return None
+    progress("detecting_language", 0.2)
+    audio_hash = hash_audio(audio)  # Once: the language and transcription cache lookups both need it
+    model_size, options = transcription_settings(audio, tier, engine, audio_hash)
+
+    progress("transcribing", 0.25)
+    return video_path, transcribe_audio(audio, model_size, engine, audio_hash, **options)
+
+# 🔹 Transcript Function (No Timeline, for Summarization)
+def transcript(drive_link, workspace=None, progress=no_progress, engine=None, tier=None):
+    """
+    Get transcript from video URL (Plain Text).
+    """
+    _, transcription_result = transcribe_video(drive_link, workspace, progress, engine, tier)
+    if transcription_result:
+        return transcription_result["text"]
+    
+    return None
 
-    # Save the transcription with timestamps
+def save_timeline_transcript(transcription_result, transcript_path):
+    """
+    Write Whisper segments as `At hh:mm:ss: text` lines. Returns the path, or None on failure.
+    """
     try:
-        with open(transcript_path, 'w') as f:
+        with open(transcript_path, 'w', encoding="utf-8") as f:
             for segment in transcription_result['segments']:
                 start_time = segment['start']
                 text = segment['text']
@@ -117,6 +245,69 @@ def transcript_with_timeline(drive_link):
         print(f"❌ Error saving transcription: {e}")
         return None
 
+# 🔹 One timeline line: "At hh:mm:ss: text"
+TIMELINE_LINE = re.compile(r"^At (\d{2,}:\d{2}:\d{2}): ?(.*)$")
+
+def parse_timeline_transcript(transcript_text):
+    """
+    Split a timeline transcript into (timestamp, text) pairs, one per line.
+    Lines that are not timeline entries come back with a timestamp of None.
+    """
+    entries = []
+    for line in transcript_text.splitlines():
+        match = TIMELINE_LINE.match(line)
+        entries.append((match.group(1), match.group(2)) if match else (None, line))
+    return entries
+
+def transcript_with_timeline(drive_link, workspace=None, progress=no_progress, engine=None, tier=None):
+    """
+    Get transcript with timestamps from video URL and save it in the job workspace.
+    """
+    workspace = workspace or create_workspace()
+    transcript_path = os.path.join(workspace, "transcription_with_timestamps.txt")
+
+    _, transcription_result = transcribe_video(drive_link, workspace, progress, engine, tier)
+    if not transcription_result:
+        return None
+
+    return save_timeline_transcript(transcription_result, transcript_path)
+
+def stream_transcript_with_timeline(drive_link, workspace=None, progress=no_progress, engine=None, tier=None):
+    """
+    Download and transcribe a video, yielding events as the transcript is decoded:
+        {"type": "status", "stage"}                                  download / audio extraction milestones
+        {"type": "segment", "start", "end", "timestamp", "text"}     one per Whisper segment, in order
+        {"type": "done", "file_path"}                                the saved timeline transcript
+    """
+    workspace = workspace or create_workspace()
+
+    progress("downloading", 0.0)
+    yield {"type": "status", "stage": "downloading"}
+    video_path = download_video(drive_link, os.path.join(workspace, "video.mp4"))
+    if not video_path:
+        raise RuntimeError("Failed to download video")
+
+    progress("extracting_audio", 0.15)
+    yield {"type": "status", "stage": "extracting_audio"}
+    audio = extract_audio(video_path, os.path.join(workspace, "audio.f32"))
+    if audio is None:
+        raise RuntimeError("Failed to extract audio")
+
+    progress("transcribing", 0.25)
+    yield {"type": "status", "stage": "transcribing"}
+    audio_hash = hash_audio(audio)
+    model_size, options = transcription_settings(audio, tier, engine, audio_hash)
+    segments = []
+    for segment in stream_transcription(audio, model_size, engine=engine, audio_hash=audio_hash, **options):
+        segments.append(segment)
+        progress("transcribing", 0.25 + 0.75 * min(segment["end"] * SAMPLE_RATE / len(audio), 1.0))
+        yield {"type": "segment", "start": segment["start"], "end": segment["end"],
+               "timestamp": seconds_to_hms(segment["start"]), "text": segment["text"]}
+
+    transcript_path = save_timeline_transcript({"segments": segments},
+                                               os.path.join(workspace, "transcription_with_timestamps.txt"))
+    yield {"type": "done", "file_path": transcript_path}
+
 # 🔹 Save transcript (Plain Text)
 def save_transcript(transcript, filename="transcript.txt"):
     """
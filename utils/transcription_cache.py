@@ -0,0 +1,134 @@
+import os
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def _to_json(value):
+    """
+    Convert NumPy scalars/arrays that Whisper may leave in its result into JSON types.
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def hash_audio(audio, chunk_size=1024 * 1024):
+    """
+    Return the SHA-256 hex digest of an audio file's content, or of a decoded sample array.
+    """
+    digest = hashlib.sha256()
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    else:
+        data = memoryview(audio).cast("B")
+        for start in range(0, len(data), chunk_size):
+            digest.update(data[start:start + chunk_size])
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Content-addressed cache of Whisper results (segments, text, language).
+
+    Entries live as JSON files in `cache_dir`, fronted by an in-memory LRU.
+    The directory is trimmed oldest-first once it grows past `max_disk_mb`.
+    Callers always receive a deep copy, so mutating a result (e.g. translating
+    its segments in place) never corrupts the cache.
+    """
+
+    def __init__(self, cache_dir, max_memory_entries=32, max_disk_mb=512):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_mb * 1024 * 1024 if max_disk_mb else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_hash, model_size, options=None):
+        """
+        Build a cache key from the audio digest, model size and decode options.
+        """
+        payload = json.dumps({"audio": audio_hash, "model": model_size, "options": options or {}},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return a copy of the cached result for `key`, or None on a miss.
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return copy.deepcopy(result)
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """
+        Store `result` under `key` in memory and on disk, and return a copy of the stored
+        (JSON-normalized) result, even if it could not be written to disk.
+        """
+        result = json.loads(json.dumps(result, default=_to_json))
+        self._remember(key, result)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"❌ Error writing transcription cache: {e}")
+        else:
+            self._evict()
+        return copy.deepcopy(result)
+
+    def _evict(self):
+        if self.max_disk_bytes is None:
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,254 @@
+import os
+import sys
+import time
+import threading
+import importlib.util
+import numpy as np
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config import (
+    TRANSCRIPTION_ENGINE, WHISPER_MEMORY_BUDGET_MB, FASTER_WHISPER_COMPUTE_TYPE, TRANSCRIPTION_TIERS, TRANSCRIPTION_TIER
+)
+from utils.model_registry import ModelRegistry
+from utils.media import SAMPLE_RATE
+
+# Whisper detects the language from its first 30-second window
+LANGUAGE_DETECTION_SECONDS = 30
+
+
+class TranscriptionEngine:
+    """
+    Interface for speech-to-text implementations.
+
+    `transcribe()` takes a file path or 16 kHz mono float32 samples plus Whisper-style
+    decode options, and returns a Whisper-style result: {"text", "segments", "language"},
+    where every segment has at least id, seek, start, end and text.
+    `detect_language()` returns the language code spoken in (the first 30 seconds of) `audio`.
+    Loaded models are kept in `self.models`, a ModelRegistry keyed by model size.
+    `module` / `package` name the import an engine needs and the pip package that provides it.
+    """
+    name = "base"
+    module = None
+    package = None
+
+    @classmethod
+    def is_installed(cls):
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+    def __init__(self, cpu_threads=0):
+        self.cpu_threads = cpu_threads
+        self.models = ModelRegistry(self.load, memory_budget_mb=WHISPER_MEMORY_BUDGET_MB)
+
+    def load(self, model_size):
+        raise NotImplementedError
+
+    def transcribe(self, audio, model_size="base", **options):
+        raise NotImplementedError
+
+    def detect_language(self, audio, model_size="base"):
+        raise NotImplementedError
+
+
+class WhisperEngine(TranscriptionEngine):
+    """
+    Reference `openai-whisper` (PyTorch, fp32 on CPU).
+    """
+    name = "whisper"
+    module = "whisper"
+    package = "openai-whisper"
+
+    def load(self, model_size):
+        import torch
+        import whisper  # 🔹 Imported on first use: pulls in torch
+        if self.cpu_threads:
+            torch.set_num_threads(self.cpu_threads)
+        return whisper.load_model(model_size, device="cpu")
+
+    def transcribe(self, audio, model_size="base", **options):
+        options.setdefault("fp16", False)  # fp16 is unsupported on CPU; avoids the per-call warning
+        with self.models.use(model_size) as model:
+            return model.transcribe(audio, **options)
+
+    def detect_language(self, audio, model_size="base"):
+        import whisper
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        clip = whisper.pad_or_trim(np.asarray(audio[:LANGUAGE_DETECTION_SECONDS * SAMPLE_RATE], dtype=np.float32))
+        with self.models.use(model_size) as model:
+            mel = whisper.log_mel_spectrogram(clip, model.dims.n_mels).to(model.device)
+            _, probs = model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """
+    `faster-whisper`: the same Whisper checkpoints converted to CTranslate2 and run with
+    int8 weights (FASTER_WHISPER_COMPUTE_TYPE) on CPU.
+    """
+    name = "faster-whisper"
+    module = "faster_whisper"
+    package = "faster-whisper"
+
+    # Whisper option names that faster-whisper spells differently, and options it does not take
+    RENAMED_OPTIONS = {"logprob_threshold": "log_prob_threshold"}
+    DROPPED_OPTIONS = ("fp16", "verbose")
+
+    def load(self, model_size):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError("The faster-whisper engine needs `pip install faster-whisper`") from e
+        return WhisperModel(model_size, device="cpu", compute_type=FASTER_WHISPER_COMPUTE_TYPE,
+                            cpu_threads=self.cpu_threads)
+
+    def transcribe(self, audio, model_size="base", **options):
+        kwargs = {self.RENAMED_OPTIONS.get(key, key): value for key, value in options.items()
+                  if key not in self.DROPPED_OPTIONS}
+        if kwargs.get("beam_size") is None:
+            kwargs["beam_size"] = 1  # Whisper's default is greedy decoding; faster-whisper's is 5 beams
+        with self.models.use(model_size) as model:
+            segments, info = model.transcribe(audio, **kwargs)
+            segments = [self._segment_to_dict(segment) for segment in segments]  # Decoding happens here
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": info.language
+        }
+
+    def detect_language(self, audio, model_size="base"):
+        from faster_whisper.audio import decode_audio
+        if isinstance(audio, str):
+            audio = decode_audio(audio)
+        with self.models.use(model_size) as model:
+            # Language detection runs eagerly; the segment generator is never consumed
+            clip = np.asarray(audio[:LANGUAGE_DETECTION_SECONDS * SAMPLE_RATE], dtype=np.float32)
+            _, info = model.transcribe(clip, without_timestamps=True)
+        return info.language
+
+    @staticmethod
+    def _segment_to_dict(segment):
+        result = {
+            "id": segment.id,
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob
+        }
+        if segment.words:
+            result["words"] = [
+                {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                for word in segment.words
+            ]
+        return result
+
+
+TRANSCRIPTION_ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_transcription_engine(name, factory):
+    """
+    Make an engine selectable by name (`factory(cpu_threads=...)` must return a TranscriptionEngine).
+    """
+    TRANSCRIPTION_ENGINES[name] = factory
+
+
+def get_transcription_engine(name=None):
+    """
+    Return the shared engine instance for `name` (default: TRANSCRIPTION_ENGINE).
+    """
+    name = name or TRANSCRIPTION_ENGINE
+    if name not in TRANSCRIPTION_ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}. Available: {', '.join(TRANSCRIPTION_ENGINES)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = TRANSCRIPTION_ENGINES[name]()
+        return _instances[name]
+
+
+def tier_model_size(tier=None, language=None):
+    """
+    Return the model size a quality tier (default: TRANSCRIPTION_TIER) uses for audio in `language`:
+    tiers marked `english_only` switch to the `.en` checkpoint for English.
+    """
+    settings = TRANSCRIPTION_TIERS[tier or TRANSCRIPTION_TIER]
+    model_size = settings["model_size"]
+    has_english_model = not (model_size.endswith(".en") or model_size.startswith("large") or model_size == "turbo")
+    if settings.get("english_only") and has_english_model and language == "en":
+        return f"{model_size}.en"
+    return model_size
+
+
+def missing_engine_package(name=None):
+    """
+    Return the pip package to install when engine `name` (default: TRANSCRIPTION_ENGINE) cannot be
+    imported here, or None when it is installed.
+    """
+    factory = TRANSCRIPTION_ENGINES[name or TRANSCRIPTION_ENGINE]
+    if getattr(factory, "is_installed", lambda: True)():
+        return None
+    return factory.package
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance between two transcripts, divided by the reference length.
+    """
+    reference, hypothesis = reference.lower().split(), hypothesis.lower().split()
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / max(len(reference), 1)
+
+
+def compare_engines(audio, model_size="base", engines=tuple(TRANSCRIPTION_ENGINES), **options):
+    """
+    Transcribe `audio` with every engine and report wall-clock time, real-time factor and
+    word error rate against the first engine (the reference).
+    """
+    duration = len(audio) / SAMPLE_RATE
+    reports, reference_text = [], None
+    for name in engines:
+        engine = get_transcription_engine(name)
+        engine.models.preload([model_size])  # Keep model loading out of the timing
+
+        start = time.perf_counter()
+        result = engine.transcribe(audio, model_size, **options)
+        seconds = time.perf_counter() - start
+
+        if reference_text is None:
+            reference_text = result["text"]
+        reports.append({
+            "engine": name,
+            "seconds": round(seconds, 2),
+            "real_time_factor": round(seconds / duration, 3) if duration else None,
+            "wer_vs_reference": round(word_error_rate(reference_text, result["text"]), 3),
+            "language": result.get("language")
+        })
+    return reports
+
+
+# 🔹 Comparison: python utils/transcription_engines.py <video_or_audio> [model_size] [engine ...]
+if __name__ == "__main__":
+    from utils.media import decode_audio
+
+    samples = decode_audio(sys.argv[1])
+    size = sys.argv[2] if len(sys.argv) > 2 else "base"
+    for report in compare_engines(samples, size, sys.argv[3:] or tuple(TRANSCRIPTION_ENGINES)):
+        print(f"⏱️ {report['engine']}: {report['seconds']:.2f}s (RTF {report['real_time_factor']}), "
+              f"WER vs reference {report['wer_vs_reference']:.1%}")
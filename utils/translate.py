@@ -1,21 +1,151 @@
 import os
-from deep_translator import GoogleTranslator
-from utils.transcript import transcript_with_timeline
-from utils.config import RESULTS_DIR  # ✅ Import shared results directory
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.transcript import transcribe_video, save_timeline_transcript, parse_timeline_transcript
+from utils.jobs import create_workspace, no_progress
+from utils.translation_backends import get_translation_backend
+from utils.translation_memory import TranslationMemory
+from utils.config import (  # ✅ Import shared results directory
+    RESULTS_DIR, TRANSLATION_WORKERS, TRANSLATION_RETRIES, TRANSLATION_BATCH_CHARS,
+    TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES, TRANSLATION_MEMORY_LRU_ENTRIES
+)
 
 # Ensure 'results' directory exists
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
+# 🔹 Translations are remembered across requests (recurring intros, repeated segments, ...)
+translation_memory = TranslationMemory(
+    TRANSLATION_MEMORY_PATH,
+    max_entries=TRANSLATION_MEMORY_MAX_ENTRIES,
+    lru_entries=TRANSLATION_MEMORY_LRU_ENTRIES
+)
+
+# 🔹 Segments in a batch are joined one per line; a reply with a different line count
+#    means the provider merged or split segments, and that batch is retried one by one
+SEGMENT_DELIMITER = "\n"
+
+
+### **🔹 Function: Translate Many Segments in Batches**
+def pack_batches(texts, max_chars):
+    """
+    Group segment indexes into batches whose joined text stays under `max_chars`.
+    """
+    batches, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        extra = len(text) + len(SEGMENT_DELIMITER)
+        if current and size + extra > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += extra
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_long_text(text, max_chars):
+    """
+    Split text longer than `max_chars` on sentence boundaries (then words) into pieces
+    that each fit in one request.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?。！？])\s+", text):
+        words = [sentence] if len(sentence) <= max_chars else sentence.split(" ")
+        # A single "word" over the limit (e.g. a URL) is cut into fixed-size slices
+        words = [word[i:i + max_chars] for word in words for i in range(0, len(word), max_chars)]
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if len(candidate) > max_chars:
+                pieces.append(current)
+                candidate = word
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _call_with_retries(backend, text, source_language, target_language, retries=TRANSLATION_RETRIES):
+    for attempt in range(retries + 1):
+        try:
+            return backend.translate(text, source_language, target_language) or ""
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️ Translation request failed ({e}); retrying in {delay}s...")
+            time.sleep(delay)
+
+
+def _translate_batch(backend, texts, source_language, target_language):
+    translated = _call_with_retries(backend, SEGMENT_DELIMITER.join(texts), source_language, target_language)
+    parts = translated.split(SEGMENT_DELIMITER)
+    if len(parts) == len(texts):
+        return [part.strip() for part in parts]
+
+    # Segment boundaries were not preserved: fall back to one request per segment
+    return [_call_with_retries(backend, text, source_language, target_language).strip() for text in texts]
+
+
+def translate_segments(texts, target_language="fr", source_language="auto", backend=None,
+                       max_workers=TRANSLATION_WORKERS, memory=translation_memory):
+    """
+    Translate a list of short texts (e.g. Whisper segments), preserving order and count.
+
+    Repeated texts are translated once and known ones come from the translation memory.
+    The rest are packed several per request and the batches run concurrently on a bounded
+    thread pool, with retries; the backend applies its own rate limit.
+    Pass the detected `source_language` when known: memory entries are keyed by it, so the same
+    text in two languages (German "Gift", English "gift") is not translated alike.
+    """
+    backend = backend or get_translation_backend()
+    cleaned = [" ".join(text.split()) for text in texts]  # Newlines would break the delimiter
+    unique = list(dict.fromkeys(text for text in cleaned if text))
+
+    known = memory.get_many(unique, source_language, target_language, backend.name) if memory else {}
+    max_chars = min(backend.max_chars, TRANSLATION_BATCH_CHARS)
+
+    # Texts over the request limit are split into sentence-sized pieces and rejoined afterwards
+    pieces = {text: split_long_text(text, max_chars) for text in unique if text not in known}
+    pending = list(dict.fromkeys(piece for parts in pieces.values() for piece in parts))
+    batches = [[pending[i] for i in batch] for batch in pack_batches(pending, max_chars)]
+
+    def run(batch):
+        return batch, _translate_batch(backend, batch, source_language, target_language)
+
+    translated_pieces = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch, results in pool.map(run, batches):
+            translated_pieces.update(zip(batch, results))
+
+    translated = {text: " ".join(translated_pieces[piece] for piece in parts) for text, parts in pieces.items()}
+
+    if memory:
+        memory.put_many(translated, source_language, target_language, backend.name)
+        if unique:
+            print(f"🧠 Translation memory: {len(known)}/{len(unique)} segments reused")
+
+    known.update(translated)
+    return [known.get(text, text) for text in cleaned]
+
 
 ### **🔹 Function: Translate a Given File**
-def translate_file(input_filename, output_filename, target_language="fr"):
+def translate_file(input_filename, output_filename, target_language="fr", source_language="auto"):
     """
     Translate a text file and save the translated version.
 
+    Timeline transcripts keep their structure: only the text after each `At hh:mm:ss:`
+    prefix is translated, in size-bounded chunks processed in parallel, and every line is
+    written back with its original timestamp. Other files are translated line by line.
+
     Parameters:
-        input_filename (str): The name of the file to translate.
-        output_filename (str): The output filename for the translated text.
+        input_filename (str): The name of the file to translate (relative to RESULTS_DIR, or an absolute path).
+        output_filename (str): The output filename for the translated text (relative to RESULTS_DIR, or an absolute path).
         target_language (str): Target language (default is French "fr").
+        source_language (str): Language of the file, e.g. as detected by Whisper (default "auto").
 
     Returns:
         str: Path to the translated file.
@@ -30,14 +160,15 @@ def translate_file(input_filename, output_filename, target_language="fr"):
 
     # Read the content from the source file (force UTF-8 decoding)
     with open(input_path, "r", encoding="utf-8") as file:
-        original_text = file.read()
+        entries = parse_timeline_transcript(file.read())
 
-    # Translate the text
-    translated_text = GoogleTranslator(source="auto", target=target_language).translate(original_text)
+    # Translate only the text of each entry; timestamps never reach the translator
+    translated_texts = translate_segments([text for _, text in entries], target_language, source_language)
 
     # Write the translated text to a new file (force UTF-8 encoding)
     with open(output_path, "w", encoding="utf-8") as file:
-        file.write(translated_text)
+        for (timestamp, _), text in zip(entries, translated_texts):
+            file.write(f"At {timestamp}: {text}\n" if timestamp else f"{text}\n")
 
     print(f"✅ Translation completed: {output_path}")
 
@@ -45,31 +176,66 @@ def translate_file(input_filename, output_filename, target_language="fr"):
 
 
 
+### **🔹 Function: Run One Task per Target Language Concurrently**
+def fan_out_languages(target_languages, task, max_workers=TRANSLATION_WORKERS):
+    """
+    Call `task(language)` for every target language on a thread pool.
+    Returns {language: result} in the order the languages were given.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(target_languages)))) as pool:
+        results = list(pool.map(task, target_languages))
+    return dict(zip(target_languages, results))
+
+
+def same_language(source_language, target_language):
+    """
+    True when a detected (ISO 639-1) source language matches a target code such as "en" or "zh-CN".
+    """
+    return bool(source_language) and target_language.split("-")[0].lower() == source_language.lower()
+
+
 ### **🔹 Function: Extract & Translate Transcript with Timeline**
-def extract_and_translate_transcript(video_url, target_language="fr"):
+def extract_and_translate_transcript(video_url, target_language="fr", workspace=None, progress=no_progress,
+                                     engine=None, tier=None):
     """
-    1️⃣ Extract transcript with timestamps.
-    2️⃣ Translate it into the target language.
-    
+    1️⃣ Extract transcript with timestamps (once).
+    2️⃣ Translate it into the target language(s), concurrently when several are given.
+       Targets matching the spoken language reuse the original transcript untranslated.
+
+    `target_language` is a language code or a list of codes; `engine` and `tier` select the
+    transcription engine and quality tier.
+
     Returns:
-        dict: Paths to the original and translated transcripts.
+        dict: Paths to the original transcript, the translated transcript of the first
+        language, and `translations` mapping every language to its translated transcript.
     """
-    transcript_path = transcript_with_timeline(video_url)
+    workspace = workspace or create_workspace()
+    target_languages = [target_language] if isinstance(target_language, str) else list(target_language)
+    _, transcription = transcribe_video(video_url, workspace, progress, engine, tier)
+    transcript_path = transcription and save_timeline_transcript(
+        transcription, os.path.join(workspace, "transcription_with_timestamps.txt")
+    )
 
     if not transcript_path:
         return {"error": "Transcript extraction failed"}
 
-    # Define translated file name
-    translated_filename = f"transcript_with_timeline_{target_language}.txt"
+    def translate_to(language):
+        if same_language(transcription.get("language"), language):
+            print(f"⏭️ Transcript is already in {language}, skipping translation")
+            return transcript_path
 
-    translated_transcript_path = translate_file(
-        os.path.basename(transcript_path), translated_filename, target_language
-    )
+        # Define translated file path (next to the original, inside the workspace)
+        translated_path = os.path.join(workspace, f"transcript_with_timeline_{language}.txt")
+        return translate_file(transcript_path, translated_path, language, transcription.get("language") or "auto")
+
+    progress("translating", 0.8)
+    translations = fan_out_languages(target_languages, translate_to)
 
-    if not translated_transcript_path:
+    if not all(translations.values()):
         return {"error": "Translation failed"}
 
     return {
         "original_transcript": transcript_path,
-        "translated_transcript": translated_transcript_path
+        "translated_transcript": translations[target_languages[0]],
+        "translations": translations
     }
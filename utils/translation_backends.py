@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+import time
+from deep_translator import GoogleTranslator
+
+# 🔹 Ensure Python can find `utils/`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config import TRANSLATION_BACKEND, TRANSLATION_MAX_REQUESTS_PER_SECOND
+
+
+class RateLimiter:
+    """
+    Spaces out calls across all threads to at most `rate` per second.
+    """
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class TranslationBackend:
+    """
+    Interface for translation providers.
+
+    `translate()` translates one string; `max_chars` is the largest request the provider
+    accepts, used to pack several segments into one call.
+    """
+    name = "base"
+    max_chars = 4500
+
+    def translate(self, text, source_language, target_language):
+        raise NotImplementedError
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """
+    Google Translate through `deep_translator` (5000 characters per request).
+    """
+    name = "google"
+    max_chars = 4500
+    # Whisper language codes that Google Translate spells differently
+    LANGUAGE_ALIASES = {"zh": "zh-CN", "he": "iw"}
+
+    def __init__(self, rate=TRANSLATION_MAX_REQUESTS_PER_SECOND):
+        self._limiter = RateLimiter(rate)
+        self._languages = set(GoogleTranslator().get_supported_languages(as_dict=True).values())
+
+    def translate(self, text, source_language, target_language):
+        source_language = self.LANGUAGE_ALIASES.get(source_language, source_language)
+        if source_language not in self._languages:
+            source_language = "auto"  # Detected by Whisper but unknown to Google: let Google detect it
+        self._limiter.wait()
+        return GoogleTranslator(source=source_language, target=target_language).translate(text)
+
+
+class EchoBackend(TranslationBackend):
+    """
+    Local stand-in that returns the text unchanged, tagged with the target language.
+    Useful offline and in tests: no network, deterministic, and line structure is preserved.
+    """
+    name = "echo"
+    max_chars = 4500
+
+    def translate(self, text, source_language, target_language):
+        return "\n".join(f"[{target_language}] {line}" if line else line for line in text.split("\n"))
+
+
+_BACKENDS = {
+    GoogleTranslateBackend.name: GoogleTranslateBackend,
+    EchoBackend.name: EchoBackend
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_translation_backend(name, factory):
+    """
+    Make a backend selectable by name (`factory()` must return a TranslationBackend).
+    """
+    _BACKENDS[name] = factory
+
+
+def get_translation_backend(name=None):
+    """
+    Return the shared backend instance for `name` (default: TRANSLATION_BACKEND).
+    """
+    name = name or TRANSLATION_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name}. Available: {', '.join(_BACKENDS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = _BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,130 @@
+import os
+import time
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_source(text):
+    """
+    Canonical form used as the memory key: NFC Unicode and collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationMemory:
+    """
+    Persistent translation memory keyed by (normalized source text, source language,
+    target language, backend).
+
+    Lookups hit an in-process LRU first, then SQLite. The table is trimmed to
+    `max_entries` rows, dropping the least recently used translations.
+    """
+
+    def __init__(self, db_path, max_entries=200000, lru_entries=10000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lru_entries = lru_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                source_text TEXT NOT NULL,
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_text, source_language, target_language, backend)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self._db.commit()
+
+    def _remember(self, key, translation):
+        self._lru[key] = translation
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, texts, source_language, target_language, backend):
+        """
+        Return {text: translation} for every text already in memory.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for text in texts:
+                key = (normalize_source(text), source_language, target_language, backend)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[text] = self._lru[key]
+                else:
+                    missing.append((text, key))
+
+            now = time.time()
+            for text, key in missing:
+                row = self._db.execute(
+                    "SELECT translation FROM translations WHERE source_text = ? AND source_language = ? "
+                    "AND target_language = ? AND backend = ?", key
+                ).fetchone()
+                if row is not None:
+                    found[text] = row[0]
+                    self._remember(key, row[0])
+                    self._db.execute(
+                        "UPDATE translations SET last_used = ? WHERE source_text = ? AND source_language = ? "
+                        "AND target_language = ? AND backend = ?", (now,) + key
+                    )
+            self._db.commit()
+
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, translations, source_language, target_language, backend):
+        """
+        Store {text: translation} pairs and trim the table to `max_entries`.
+        """
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            rows = []
+            for text, translation in translations.items():
+                key = (normalize_source(text), source_language, target_language, backend)
+                self._remember(key, translation)
+                rows.append(key + (translation, now))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(source_text, source_language, target_language, backend, translation, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+            count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (count - self.max_entries,)
+                )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "lru_entries": len(self._lru)
+            }